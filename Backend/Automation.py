@@ -1,23 +1,123 @@
 import os
 import re
 import sys
+import time
 import subprocess
 from typing import Optional, Dict, Any
 from openai import OpenAI
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+# Add parent directory to Python path for backend module imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from Backend.CodeRunner import CodeWorkerPool, ExecutionResult
+
+class ScriptCache:
+    """
+    Persistent cache of generated automation scripts.
+    Scripts are keyed by normalized task text and only cached after they ran
+    successfully, so repeated tasks like "close Google Chrome" skip the model call.
+    A cached script that fails is evicted; so are scripts unused for `max_age_days`
+    and the least recently used ones beyond `max_entries`, whenever a script is stored.
+    The table lives in FALCON's database and uses its pooled per-thread connections.
+    """
+    FILLER = re.compile(r"^(?:(?:hey\s+)?falcon\s+|please\s+|can you\s+|could you\s+|would you\s+)+|(?:\s+(?:please|for me|now))+$")
+
+    def __init__(self, db: "FALCONDatabase", max_entries: int = 200, max_age_days: int = 30):
+        self.db = db
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        with self.db._get_connection() as conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS automation_scripts (
+                task_key TEXT PRIMARY KEY,
+                task TEXT NOT NULL,
+                code TEXT NOT NULL,
+                success_count INTEGER NOT NULL DEFAULT 0,
+                last_outcome TEXT,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            ''')
+        self.evict()
+
+    @classmethod
+    def normalize(cls, task: str) -> str:
+        """Lowercases, strips punctuation and politeness so equivalent requests share a key."""
+        text = re.sub(r"[^\w\s]", " ", task.lower())
+        text = re.sub(r"\s+", " ", text).strip()
+        return cls.FILLER.sub("", text).strip()
+
+    def get(self, task: str) -> Optional[str]:
+        """Returns the cached script for a task, or None."""
+        key = self.normalize(task)
+        with self.db._get_connection() as conn:
+            row = conn.execute('SELECT code FROM automation_scripts WHERE task_key = ?', (key,)).fetchone()
+            if row:
+                conn.execute('UPDATE automation_scripts SET last_used = ? WHERE task_key = ?', (time.time(), key))
+        return row[0] if row else None
+
+    def record(self, task: str, code: str, succeeded: bool):
+        """Stores a script that ran successfully (evicting stale ones), or evicts one that failed."""
+        key = self.normalize(task)
+        now = time.time()
+        with self.db._get_connection() as conn:
+            if not succeeded:
+                conn.execute('DELETE FROM automation_scripts WHERE task_key = ?', (key,))
+                return
+            conn.execute('''
+            INSERT INTO automation_scripts (task_key, task, code, success_count, last_outcome, created_at, last_used)
+            VALUES (?, ?, ?, 1, 'success', ?, ?)
+            ON CONFLICT(task_key) DO UPDATE SET
+                code = excluded.code, success_count = success_count + 1,
+                last_outcome = 'success', last_used = excluded.last_used
+            ''', (key, task, code, now, now))
+            self._evict(conn)
+
+    def evict(self):
+        """Drops stale scripts, then trims to `max_entries` by least recent use."""
+        with self.db._get_connection() as conn:
+            self._evict(conn)
+
+    def _evict(self, conn):
+        conn.execute('DELETE FROM automation_scripts WHERE last_used < ?', (time.time() - self.max_age,))
+        conn.execute('''
+        DELETE FROM automation_scripts WHERE task_key NOT IN (
+            SELECT task_key FROM automation_scripts ORDER BY last_used DESC LIMIT ?
+        )
+        ''', (self.max_entries,))
+
 class FalconAI:
     """
     Falcon AI Assistant - Advanced Task Executor
     A powerful AI assistant that can execute system tasks safely and efficiently.
     """
     
-    def __init__(self):
-        """Initialize Falcon AI Assistant"""
+    def __init__(self, db: "FALCONDatabase" = None):
+        """
+        Initialize Falcon AI Assistant
+
+        Args:
+            db (FALCONDatabase): Database holding the script cache; FALCON's default one if None
+        """
         self.load_environment()
         self.initialize_client()
         self.setup_conversation_context()
+        if db is None:
+            # Imported here because Backend.Brain imports this module
+            from Backend.Brain import FALCONDatabase
+            db = FALCONDatabase(write_behind=False)
+        self.script_cache = ScriptCache(db)
+        # Generated scripts run in warm worker processes, isolated from the UI process
+        self.code_pool = None
+        try:
+            self.code_pool = CodeWorkerPool()
+        except Exception as e:
+            print(f"⚠️ Could not start code workers, scripts will run in-process: {e}")
         
     def load_environment(self):
         """Load environment variables safely"""
@@ -191,12 +291,28 @@ class FalconAI:
         Returns:
             str: Execution result message
         """
+        return self._execute_code(code).stdout.strip()
+
+    def _execute_code(self, code: str) -> ExecutionResult:
+        """
+        Validates and executes Python code, in a worker process when the pool is running
+        
+        Args:
+            code (str): Python code to execute
+            
+        Returns:
+            ExecutionResult: Success flag, captured output and error message
+        """
         if not code:
-            return ""
+            return ExecutionResult(False, "", "", "No code to execute", 0.0)
             
         if not self.validate_code_safety(code):
-            return ""
+            return ExecutionResult(False, "", "", "Code failed safety validation", 0.0)
+
+        if self.code_pool:
+            return self.code_pool.run(code)
             
+        start = time.perf_counter()
         try:
             # Create a controlled execution environment
             exec_globals = {
@@ -212,13 +328,13 @@ class FalconAI:
             # Execute the code
             exec(code, exec_globals)
             
-            return ""
+            return ExecutionResult(True, "", "", None, time.perf_counter() - start)
             
         except ImportError as e:
-            return ""
+            return ExecutionResult(False, "", "", f"ImportError: {e}", time.perf_counter() - start)
             
         except Exception as e:
-            return ""
+            return ExecutionResult(False, "", "", f"{type(e).__name__}: {e}", time.perf_counter() - start)
     
     def _module_available(self, module_name: str) -> bool:
         """Check if a module is available for import"""
@@ -236,24 +352,74 @@ class FalconAI:
             task (str): Task description
             
         Returns:
-            str: Final execution result
+            str: The script's output on success, otherwise "Task failed: " with the
+            error and the end of stderr
+        """
+        result = self.run_task_result(task)
+        if result.ok:
+            return result.stdout.strip()
+        return f"Task failed: {self.describe_failure(result)}"
+
+    def run_task_result(self, task: str) -> ExecutionResult:
+        """
+        Complete task execution pipeline, keeping the outcome of the script run
+
+        Args:
+            task (str): Task description
+
+        Returns:
+            ExecutionResult: Success flag, captured output and error of the last attempt
         """
         if not task.strip():
-            return ""
+            return ExecutionResult(False, "", "", "Empty task description", 0.0)
+
+        # Step 0: Reuse a script that already worked for this task
+        code = self.script_cache.get(task)
+        if code:
+            result = self._execute_code(code)
+            self.script_cache.record(task, code, result.ok)
+            if result.ok:
+                return result
+            # The cached script stopped working (app moved, UI changed): regenerate it once below
             
         # Step 1: Get AI response
         response = self.execute_task(task)
         if not response:
-            return ""
+            return ExecutionResult(False, "", "", "Could not get a script from the model", 0.0)
             
         # Step 2: Extract code
         code = self.extract_code_from_response(response)
         if not code:
-            return ""
+            return ExecutionResult(False, "", "", "The model's response contained no Python code", 0.0)
             
-        # Step 3: Execute code silently
-        self.execute_python_code(code)
-        return ""
+        # Step 3: Execute code, caching it only if it worked
+        result = self._execute_code(code)
+        if result.ok:
+            self.script_cache.record(task, code, True)
+        return result
+
+    @staticmethod
+    def describe_failure(result: ExecutionResult, stderr_lines: int = 5) -> str:
+        """
+        Summarizes a failed run for the user and the model
+
+        Args:
+            result (ExecutionResult): The failed run
+            stderr_lines (int): How many trailing stderr lines to include
+
+        Returns:
+            str: The error, followed by the last lines of stderr if there are any
+        """
+        message = result.error or "The script failed without an error message"
+        tail = result.stderr.strip().splitlines()[-stderr_lines:]
+        if tail:
+            message += "\nLast stderr lines:\n" + "\n".join(tail)
+        return message
+    
+    def close(self):
+        """Stops the code worker processes"""
+        if self.code_pool:
+            self.code_pool.close()
     
     def interactive_mode(self):
         """Run Falcon AI in interactive mode"""
@@ -0,0 +1,485 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import statistics
+
+# Add parent directory to Python path for backend module imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+
+def _summarize(label: str, samples: list[float]) -> dict:
+    """Prints and returns mean/p50/p95 (in milliseconds) for a list of second-based samples."""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    result = {
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": p95 * 1000,
+    }
+    print(f"{label:<28} mean {result['mean_ms']:8.3f} ms   p50 {result['p50_ms']:8.3f} ms   p95 {result['p95_ms']:8.3f} ms")
+    return result
+
+
+# --- Database: per-turn overhead ---
+def bench_database(turns: int = 300) -> dict:
+    """
+    Measures the SQLite work done by one `process_message` turn, comparing a fresh
+    connection per call (the previous behaviour) with the pooled WAL connections.
+
+    Args:
+        turns (int): Number of simulated conversation turns per variant
+
+    Returns:
+        dict: Latency summary for each variant
+    """
+    from Backend.Brain import FALCONDatabase
+
+    class UnpooledDatabase(FALCONDatabase):
+        """Previous behaviour: a brand-new connection for every method call, synchronous commits."""
+        def __init__(self, db_path: str):
+            super().__init__(db_path, write_behind=False)
+
+        def _get_connection(self) -> sqlite3.Connection:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            return conn
+
+    def run_turn(db: FALCONDatabase, i: int):
+        # Mirrors the database calls made by FALCONAssistant.process_message
+        conversation_id = db.add_conversation_turn(f"benchmark message {i} about the weather")
+        db.search_memory_notes(f"benchmark message {i} about the weather")
+        db.get_recent_conversation(limit=3)
+        db.update_assistant_response(conversation_id, f"benchmark answer {i}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        variants = (
+            ("before (connect per call)", lambda path: UnpooledDatabase(path)),
+            ("pooled + WAL", lambda path: FALCONDatabase(path, write_behind=False)),
+            ("pooled + WAL + write-behind", lambda path: FALCONDatabase(path)),
+        )
+        for n, (label, factory) in enumerate(variants):
+            db = factory(os.path.join(tmp, f"variant_{n}.db"))
+            for i in range(20):
+                db.add_memory_note(f"seed note {i} about the weather", "weather,seed")
+            samples = []
+            for i in range(turns):
+                start = time.perf_counter()
+                run_turn(db, i)
+                samples.append(time.perf_counter() - start)
+            results[label] = _summarize(label, samples)
+            db.close()
+    return results
+
+
+# --- Database: recall latency as history grows ---
+def bench_search(sizes: tuple = (1_000, 10_000, 100_000), queries: int = 50) -> dict:
+    """
+    Compares LIKE scans with the FTS5/BM25 index for conversation and memory recall
+    at increasing table sizes.
+
+    Args:
+        sizes (tuple): Row counts to populate before measuring
+        queries (int): Number of searches per size and variant
+
+    Returns:
+        dict: Latency summary keyed by "<variant>@<rows>"
+    """
+    import random
+    from Backend.Brain import FALCONDatabase
+
+    rng = random.Random(0)
+    # Chat text is Zipfian: a handful of everyday words appear in a large share of turns and
+    # the long tail is rare. Common English words head the ranking, pseudo-words fill the tail,
+    # and both the stored text and the queries are drawn with 1/rank weights.
+    common = """
+    time like know think good want need make work day today going help just really now also
+    get see new way one thing music song play open file weather tomorrow meeting email project
+    code python call message remind home people year back right well still sure yes thanks
+    """.split()
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    tail = sorted({"".join(rng.choices(letters, k=rng.randint(4, 9))) for _ in range(5000)} - set(common))
+    vocabulary = common + tail
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+
+    def words(k: int) -> list:
+        return rng.choices(vocabulary, weights=weights, k=k)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = FALCONDatabase(os.path.join(tmp, "search.db"))
+        rows = 0
+        for size in sizes:
+            with db._get_connection() as conn:
+                conn.executemany(
+                    'INSERT INTO conversations (user_message, assistant_response) VALUES (?, ?)',
+                    ((" ".join(words(8)), " ".join(words(20))) for _ in range(size - rows)),
+                )
+                conn.executemany(
+                    'INSERT INTO long_term_memory (memory_content, keywords) VALUES (?, ?)',
+                    ((" ".join(words(10)), ",".join(words(2))) for _ in range((size - rows) // 10)),
+                )
+            rows = size
+            for fts in (False, True):
+                db.fts_enabled = fts
+                samples = []
+                for _ in range(queries):
+                    query = f"what did I say about the {' '.join(words(2))}"
+                    start = time.perf_counter()
+                    db.search_memory_notes(query)
+                    db.search_conversation_history(" ".join(words(2)))
+                    samples.append(time.perf_counter() - start)
+                label = f"{'fts5/bm25' if fts else 'like'}@{size}"
+                results[label] = _summarize(label, samples)
+        db.close()
+    return results
+
+
+# --- Semantic memory: vector index recall latency ---
+def bench_memory(sizes: tuple = (1_000, 10_000, 50_000), queries: int = 100) -> dict:
+    """
+    Measures top-k cosine recall on the hashed TF-IDF memory index, including
+    embedding the query, at increasing numbers of stored notes.
+
+    Args:
+        sizes (tuple): Note counts to index before measuring
+        queries (int): Number of searches per size
+
+    Returns:
+        dict: Latency summary keyed by note count
+    """
+    import random
+    from Backend.VectorMemory import MemoryVectorIndex
+
+    rng = random.Random(0)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = sorted({"".join(rng.choices(letters, k=rng.randint(4, 9))) for _ in range(5000)})
+    index = MemoryVectorIndex()
+    results = {}
+    for size in sizes:
+        for memory_id in range(len(index), size):
+            index.add(memory_id, index.embed(" ".join(rng.choices(vocabulary, k=12))))
+        index.search("warm up")  # first search after inserts pays the re-normalisation once
+        samples = []
+        for _ in range(queries):
+            query = "what did I tell you about " + " ".join(rng.choices(vocabulary, k=2))
+            start = time.perf_counter()
+            index.search(query)
+            samples.append(time.perf_counter() - start)
+        results[size] = _summarize(f"vector recall@{size}", samples)
+    return results
+
+
+# --- Speech playback: start latency and CPU cost ---
+def bench_tts(audio_path: str = None, runs: int = 5) -> dict:
+    """
+    Compares the previous playback path (22.05 kHz stereo mixer, mp3 streamed through
+    pygame.mixer.music, 50 Hz polling) with decode-once PCM playback on a mixer that
+    matches edge-tts output, at a few buffer sizes. Reports start latency (audio data
+    in hand -> play() returned) and process CPU time per second of speech.
+    Headless machines can run it with SDL_AUDIODRIVER=disk SDL_DISKAUDIOFILE=/dev/null.
+
+    Args:
+        audio_path (str, optional): edge-tts mp3 to play; synthesizes a sample sentence when omitted
+        runs (int): Playbacks per variant
+
+    Returns:
+        dict: Start latency summary and CPU ms per second of speech for each variant
+    """
+    import io
+    import asyncio
+    import pygame
+    from Backend import TTS
+
+    if audio_path:
+        with open(audio_path, "rb") as f:
+            audio = f.read()
+    else:
+        audio = asyncio.run(TTS.text_to_audio_bytes(
+            "This is a benchmark sentence for Falcon. It is long enough to measure playback cost over a few seconds."
+        ))
+
+    def play_music():
+        start = time.perf_counter()
+        pygame.mixer.music.load(io.BytesIO(audio))
+        pygame.mixer.music.play()
+        started = time.perf_counter() - start
+        clock = pygame.time.Clock()
+        while pygame.mixer.music.get_busy():
+            clock.tick(50)
+        return started
+
+    def play_pcm():
+        start = time.perf_counter()
+        sound = TTS._load_chunk(audio)
+        channel = TTS._speech_channel()
+        channel.play(sound)
+        started = time.perf_counter() - start
+        # Same scheduling as the speech worker: sleep until the sound is due to end
+        time.sleep(sound.get_length())
+        while channel.get_busy():
+            time.sleep(0.005)
+        return started
+
+    variants = [("before: music 22k stereo", (22050, 2, 512), play_music)]
+    variants += [
+        (f"pcm {TTS.MIXER_FREQUENCY // 1000}k buf={buffer}", (TTS.MIXER_FREQUENCY, TTS.MIXER_CHANNELS, buffer), play_pcm)
+        for buffer in (256, 512, 1024, 2048)
+    ]
+
+    results = {}
+    for label, (frequency, channels, buffer), play in variants:
+        pygame.mixer.quit()
+        pygame.mixer.init(frequency=frequency, size=-16, channels=channels, buffer=buffer)
+        starts, cpu, speech = [], 0.0, 0.0
+        for _ in range(runs):
+            wall, cpu_start = time.perf_counter(), time.process_time()
+            starts.append(play())
+            cpu += time.process_time() - cpu_start
+            speech += time.perf_counter() - wall
+        result = _summarize(label, starts)
+        result["cpu_ms_per_speech_s"] = cpu / speech * 1000
+        result["buffer_latency_ms"] = buffer / frequency * 1000
+        print(f"{'':<28} cpu {result['cpu_ms_per_speech_s']:7.2f} ms per second of speech, output buffer {result['buffer_latency_ms']:.1f} ms")
+        results[label] = result
+    pygame.mixer.quit()
+    return results
+
+
+# --- Speech recognition: accuracy and latency per backend ---
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance divided by the reference length (case and punctuation ignored)."""
+    import re
+    ref = re.findall(r"[a-z0-9']+", reference.lower())
+    hyp = re.findall(r"[a-z0-9']+", hypothesis.lower())
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / max(1, len(ref))
+
+
+def bench_stt(fixtures_dir: str = None, backends: tuple = ("google", "vosk", "whisper")) -> dict:
+    """
+    Compares speech-to-text backends on recorded WAV fixtures: every `<name>.wav` in the
+    directory needs a `<name>.txt` with its reference transcript.
+    Audio is fed to each backend's stream in 32 ms frames (as the microphone session
+    does), and latency is measured from the end of the audio to the final text, which
+    is what the user waits for after they stop speaking.
+
+    Args:
+        fixtures_dir (str): Directory with .wav/.txt pairs (default: Database/stt_fixtures)
+        backends (tuple): Backend names from Backend.STT.STT_BACKENDS
+
+    Returns:
+        dict: Mean WER, end-of-speech latency summary and real-time factor per backend
+    """
+    import glob
+    import speech_recognition as sr
+    from Backend.STT import STT_BACKENDS
+
+    fixtures_dir = fixtures_dir or os.path.join("Database", "stt_fixtures")
+    fixtures = []
+    for wav_path in sorted(glob.glob(os.path.join(fixtures_dir, "*.wav"))):
+        txt_path = os.path.splitext(wav_path)[0] + ".txt"
+        if not os.path.exists(txt_path):
+            continue
+        with sr.AudioFile(wav_path) as source:
+            audio = sr.Recognizer().record(source)
+        with open(txt_path, encoding="utf-8") as f:
+            fixtures.append((os.path.basename(wav_path), audio, f.read().strip()))
+    if not fixtures:
+        print(f"No .wav/.txt fixture pairs found in {fixtures_dir}")
+        return {}
+
+    results = {}
+    for name in backends:
+        try:
+            backend = STT_BACKENDS[name]()
+        except Exception as e:
+            print(f"{name:<28} skipped: {e}")
+            continue
+        errors, latencies, compute, speech = [], [], 0.0, 0.0
+        for label, audio, reference in fixtures:
+            data = audio.get_raw_data(convert_rate=16000, convert_width=2)
+            stream = backend.open_stream(16000, 2)
+            start = time.perf_counter()
+            for offset in range(0, len(data), 1024):
+                stream.feed(data[offset:offset + 1024])
+            end_of_speech = time.perf_counter()
+            try:
+                hypothesis = stream.finish()
+            except sr.UnknownValueError:
+                hypothesis = ""
+            except sr.RequestError as e:
+                print(f"{name:<28} {label}: request failed ({e})")
+                continue
+            finished = time.perf_counter()
+            latencies.append(finished - end_of_speech)
+            compute += finished - start
+            speech += len(data) / (16000 * 2)
+            errors.append(word_error_rate(reference, hypothesis))
+        if not errors:
+            continue
+        result = _summarize(f"{name} end-of-speech", latencies)
+        result["wer"] = statistics.fmean(errors)
+        result["real_time_factor"] = compute / speech
+        print(f"{'':<28} WER {result['wer']:.3f}   real-time factor {result['real_time_factor']:.3f}   ({len(errors)} fixtures)")
+        results[name] = result
+    return results
+
+
+# --- Cognitive core: concurrent conversations against a mock model server ---
+def bench_concurrency(sessions: tuple = (1, 8, 32), ttft: float = 0.2, tokens: int = 20, token_interval: float = 0.005) -> dict:
+    """
+    Runs N conversations at once against a local OpenAI-compatible mock server with a
+    fixed time-to-first-token, comparing one-at-a-time blocking turns (what eel's single
+    gevent loop did) with blocking calls from N threads (multiplexed by the sync wrapper)
+    and asyncio.gather over process_message_async on one event loop.
+    The mock server runs in this process, so on small machines its CPU time shows up
+    in the concurrent latencies.
+
+    Args:
+        sessions (tuple): Numbers of concurrent conversations to test
+        ttft (float): Mock server delay before the first token, in seconds
+        tokens (int): Streamed tokens per answer
+        token_interval (float): Delay between streamed tokens, in seconds
+
+    Returns:
+        dict: Wall time, throughput and per-turn latency summary per variant and session count
+    """
+    import json
+    import asyncio
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from openai import OpenAI
+    from Backend import Brain
+
+    class MockCompletionHandler(BaseHTTPRequestHandler):
+        """Answers /chat/completions like the Groq API, streamed or not, after `ttft` seconds."""
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            time.sleep(ttft)
+            words = [f"word{i} " for i in range(tokens)]
+            if not request.get("stream"):
+                body = json.dumps({
+                    "id": "mock", "object": "chat.completion", "created": 0, "model": "mock",
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "".join(words)}}],
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for word in words:
+                chunk = {"id": "mock", "object": "chat.completion.chunk", "created": 0, "model": "mock",
+                         "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(token_interval)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+        def log_message(self, *args):
+            pass
+
+    class MockServer(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 256  # the default backlog of 5 drops bursts of connections
+
+    server = MockServer(("127.0.0.1", 0), MockCompletionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    # Point both module clients at the mock server for the duration of the benchmark
+    saved = Brain.client, Brain.GROQ_BASE_URL
+    Brain.client = OpenAI(base_url=base_url, api_key="mock")
+    Brain.GROQ_BASE_URL = base_url
+    Brain._async_clients.clear()
+
+    def on_token(delta):
+        pass
+
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Brain.FALCONDatabase(os.path.join(tmp, "concurrency.db"))
+            assistant = Brain.FALCONAssistant(db=db)
+
+            def timed(query):
+                start = time.perf_counter()
+                assistant.process_message(query, on_token=on_token)
+                return time.perf_counter() - start
+
+            async def timed_async(query):
+                start = time.perf_counter()
+                await assistant.process_message_async(query, on_token=on_token)
+                return time.perf_counter() - start
+
+            async def gather(queries):
+                return await asyncio.gather(*(timed_async(query) for query in queries))
+
+            def threaded(queries):
+                with ThreadPoolExecutor(len(queries)) as pool:
+                    return list(pool.map(timed, queries))
+
+            variants = (
+                ("sequential (blocking)", lambda queries: [timed(query) for query in queries]),
+                ("threads + sync wrapper", threaded),
+                ("asyncio.gather", lambda queries: asyncio.run(gather(queries))),
+            )
+            timed("warm up the connection and the core event loop")
+            for count in sessions:
+                queries = [f"tell me something interesting about topic number {i}" for i in range(count)]
+                for label, run in variants:
+                    start = time.perf_counter()
+                    samples = run(queries)
+                    wall = time.perf_counter() - start
+                    result = _summarize(f"{label} x{count}", samples)
+                    result["wall_s"] = wall
+                    result["turns_per_s"] = count / wall
+                    print(f"{'':<28} wall {wall:6.2f} s   {result['turns_per_s']:7.2f} turns/s")
+                    results[f"{label} x{count}"] = result
+            db.close()
+    finally:
+        Brain.client, Brain.GROQ_BASE_URL = saved
+        Brain._async_clients.clear()
+        server.shutdown()
+    return results
+
+
+BENCHMARKS = {
+    "db": bench_database,
+    "search": bench_search,
+    "memory": bench_memory,
+    "tts": bench_tts,
+    "stt": bench_stt,
+    "concurrency": bench_concurrency,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FALCON micro-benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS), help="Benchmark to run")
+    parser.add_argument("--audio", help="mp3 file for the tts benchmark (default: synthesize a sample with edge-tts)")
+    parser.add_argument("--fixtures", help="Directory of .wav/.txt pairs for the stt benchmark (default: Database/stt_fixtures)")
+    args = parser.parse_args()
+    if args.benchmark == "tts":
+        bench_tts(args.audio)
+    elif args.benchmark == "stt":
+        bench_stt(args.fixtures)
+    else:
+        BENCHMARKS[args.benchmark]()
@@ -1,10 +1,19 @@
 import os
 import sys
+import re
 import json
+import queue
+import asyncio
+import weakref
 import datetime
 import sqlite3
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from types import SimpleNamespace
 import pandas as pd
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 
 # Add parent directory to Python path for backend module imports
@@ -13,6 +22,9 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
+from Backend.Metrics import LatencyRegistry
+from Backend.Intent import IntentRouter
+
 # These imports are now wrapped in a try-except to avoid breaking the core logic if they are missing
 try:
     from Backend.Automation import FalconAI, Coder
@@ -20,8 +32,13 @@ try:
     from Backend.test import PlaySong 
 except ImportError as e:
     print(f"Warning: A backend module is missing: {e}. Related functionality will be disabled.")
-    FalconAI, Coder, ImageGenMain = None, None, None
+    FalconAI, Coder, ImageGenMain, PlaySong = None, None, None, None
 
+try:
+    from Backend.VectorMemory import MemoryVectorIndex
+except ImportError as e:
+    print(f"Warning: Semantic memory recall is disabled: {e}. Falling back to keyword search.")
+    MemoryVectorIndex = None
 
 # Load environment variables
 load_dotenv()
@@ -31,28 +48,362 @@ USERNAME = os.getenv("USERNAME")
 if not API_KEY:
     raise ValueError("GROQ_API_KEY not found in environment variables. Please check your .env file.")
 
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+CHAT_MODEL = "llama-3.3-70b-versatile"
+
 # Initialize Groq client
 client = OpenAI(
-    base_url="https://api.groq.com/openai/v1",
+    base_url=GROQ_BASE_URL,
     api_key=API_KEY
 )
 
+# AsyncOpenAI clients keep their connection pool on the event loop that first used them,
+# so there is one client per running loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> AsyncOpenAI:
+    """Returns the AsyncOpenAI client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        async_client = _async_clients[loop] = AsyncOpenAI(base_url=GROQ_BASE_URL, api_key=API_KEY)
+    return async_client
+
+# Per-tool wall-clock budgets (seconds) when several tool calls run concurrently
+TOOL_TIMEOUTS = {
+    "summarize_conversation_topic": 30,
+    "execute_system_task": 60,
+    "generate_image": 120,
+    "generate_and_save_content": 120,
+}
+DEFAULT_TOOL_TIMEOUT = 20
+
+# Tools that act on the desktop (scripts, opened files, audio). They run one at a time on their
+# own thread, in the order the model asked for them, so "open Notepad" happens before "type into Notepad"
+SEQUENTIAL_TOOLS = frozenset({
+    "execute_system_task",
+    "generate_and_save_content",
+    "play_song",
+})
+
+# Conversation history and memory notes belong to a session; the desktop app uses this one
+DEFAULT_SESSION = "local"
+
+# Tools acting on the machine FALCON runs on; a headless server leaves them out
+DESKTOP_TOOLS = frozenset({
+    "execute_system_task",
+    "generate_image",
+    "generate_and_save_content",
+    "play_song",
+})
+
+# Tools whose result text is already a complete answer for the user. When every tool
+# call in a turn is one of these and none failed, the follow-up completion is skipped.
+USER_READY_TOOLS = frozenset({
+    "execute_system_task",
+    "save_memory_note",
+    "forget_memory",
+    "generate_image",
+    "generate_and_save_content",
+    "play_song",
+})
+
+# Words too common to help ranking; dropping them keeps FTS OR-queries and memory vectors selective
+STOP_WORDS = frozenset("""
+a an and are as at be but by can could do does did for from had has have how i if in into is it its
+me my of on or our please so that the their them then there these they this to was we were what when
+where which who why will with would you your
+""".split())
+
+# FTS terms in more than this share of rows (and at least this many) are left out of OR-queries
+COMMON_TERM_RATIO = 0.05
+COMMON_TERM_MIN_ROWS = 500
+
+# Conversation IDs a write-behind database reserves at a time. IDs from different blocks
+# interleave when several writers share a file, so history is ordered by timestamp, not ID
+CONVERSATION_ID_BLOCK = 64
+
+# Owners whose memory vector index stays loaded; beyond this the least recently used one
+# is dropped (the desktop's never is) and reloaded from the database when needed again
+MEMORY_INDEX_CACHE_SIZE = 64
+
+
+class CompletionCancelled(Exception):
+    """Raised inside a streamed completion whose cancel event was set; the stream is closed."""
+
+
+class StreamedCompletion:
+    """
+    Accumulates streamed chat-completion chunks into the same result a non-streamed
+    call gives: (message for the API history, content text, tool calls or None).
+    """
+    def __init__(self, on_token=None):
+        self.on_token = on_token
+        self.content_parts = []
+        self.partial_calls = {}
+
+    def feed(self, chunk):
+        if not chunk.choices:
+            return
+        delta = chunk.choices[0].delta
+        if delta.content:
+            self.content_parts.append(delta.content)
+            if self.on_token:
+                self.on_token(delta.content)
+        # Tool calls arrive as fragments keyed by index; names and JSON arguments are concatenated
+        for fragment in delta.tool_calls or []:
+            call = self.partial_calls.setdefault(fragment.index, {"id": None, "name": "", "arguments": ""})
+            if fragment.id:
+                call["id"] = fragment.id
+            if fragment.function:
+                call["name"] += fragment.function.name or ""
+                call["arguments"] += fragment.function.arguments or ""
+
+    def result(self) -> tuple:
+        content = "".join(self.content_parts)
+        tool_calls = [
+            SimpleNamespace(id=call["id"], type="function", function=SimpleNamespace(name=call["name"], arguments=call["arguments"] or "{}"))
+            for _, call in sorted(self.partial_calls.items())
+        ]
+        message = {"role": "assistant", "content": content or None}
+        if tool_calls:
+            message["tool_calls"] = [
+                {"id": tc.id, "type": "function", "function": {"name": tc.function.name, "arguments": tc.function.arguments}}
+                for tc in tool_calls
+            ]
+        return message, content, tool_calls or None
+
+
+class ConversationWriter:
+    """
+    Write-behind persistence for the conversation log.
+    Turns are queued with IDs reserved from the database and committed by one
+    background thread, which batches everything waiting in the queue into a single
+    transaction. Until a turn is committed it stays visible through `pending()`.
+    A batch that fails is retried, then kept and retried ahead of later writes;
+    `flush()` and `close()` raise while any of it is still not persisted.
+    """
+    _STOP = object()
+
+    def __init__(self, db: "FALCONDatabase", max_pending: int = 1000, batch_size: int = 128,
+                 max_attempts: int = 3, retry_delay: float = 0.1):
+        self.db = db
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # Bounded: if the disk stalls, callers block instead of growing memory without limit
+        self.queue = queue.Queue(maxsize=max_pending)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._version = 0
+        self._failed = []
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="FalconDBWriter", daemon=True)
+        self._thread.start()
+
+    def submit_insert(self, conversation_id: int, user_message: str, assistant_response: str, timestamp: str,
+                      session_id: str = DEFAULT_SESSION):
+        with self._pending_lock:
+            self._version += 1
+            self._pending[conversation_id] = {
+                "id": conversation_id, "session_id": session_id, "user_message": user_message,
+                "assistant_response": assistant_response, "timestamp": timestamp, "version": self._version,
+            }
+            version = self._version
+        self.queue.put(("insert", conversation_id, version, (conversation_id, session_id, user_message, assistant_response, timestamp)))
+
+    def submit_update(self, conversation_id: int, assistant_response: str):
+        with self._pending_lock:
+            self._version += 1
+            entry = self._pending.setdefault(conversation_id, {"id": conversation_id})
+            entry["assistant_response"] = assistant_response
+            entry["version"] = self._version
+            version = self._version
+        self.queue.put(("update", conversation_id, version, (assistant_response, conversation_id)))
+
+    def pending(self) -> dict:
+        """Snapshot of turns not yet committed, keyed by conversation ID."""
+        with self._pending_lock:
+            return {cid: dict(entry) for cid, entry in self._pending.items()}
+
+    def flush(self):
+        """Blocks until everything queued so far has been committed. Raises if some of it failed."""
+        self.queue.join()
+        self._raise_failed()
+
+    def close(self):
+        """Commits all queued turns and stops the writer thread. Raises if some of them failed."""
+        if self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join()
+        self._raise_failed()
+
+    def _raise_failed(self):
+        with self._pending_lock:
+            failed, error = len(self._failed), self.last_error
+        if failed:
+            raise RuntimeError(f"{failed} conversation writes could not be persisted: {error}") from error
+
+    def _run(self):
+        while True:
+            try:
+                # While a failed batch waits, wake up periodically to retry it even if nothing new arrives
+                batch = [self.queue.get(timeout=self.retry_delay * 10 if self._failed else None)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is self._STOP for item in batch)
+            # Earlier failures go first so updates still land after their inserts
+            ops = self._failed + [item for item in batch if item is not self._STOP]
+            if ops:
+                self._commit_with_retry(ops)
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                return
+
+    def _commit_with_retry(self, ops: list):
+        """Commits `ops`, retrying with backoff; on final failure keeps them (and their pending view) for later."""
+        for attempt in range(self.max_attempts):
+            try:
+                self._commit(ops)
+            except Exception as e:
+                error = e
+                if attempt + 1 < self.max_attempts:
+                    time.sleep(self.retry_delay * 2 ** attempt)
+            else:
+                with self._pending_lock:
+                    self._failed, self.last_error = [], None
+                return
+        if not self._failed:
+            print(f"Error persisting conversation turns (kept for retry): {error}")
+        with self._pending_lock:
+            self._failed, self.last_error = ops, error
+
+    def _commit(self, ops: list):
+        inserts = [params for kind, _, _, params in ops if kind == "insert"]
+        updates = [params for kind, _, _, params in ops if kind == "update"]
+        with self.db._get_connection() as conn:
+            if inserts:
+                conn.executemany('INSERT INTO conversations (id, session_id, user_message, assistant_response, timestamp) VALUES (?, ?, ?, ?, ?)', inserts)
+            if updates:
+                conn.executemany('UPDATE conversations SET assistant_response = ? WHERE id = ?', updates)
+        with self._pending_lock:
+            for _, conversation_id, version, _ in ops:
+                entry = self._pending.get(conversation_id)
+                if entry is not None and entry["version"] <= version:
+                    del self._pending[conversation_id]
+
+class _ThreadConnection:
+    """One thread's pooled connection, held in thread-local storage."""
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+def _close_connection(conn: sqlite3.Connection, connections: set, lock: threading.Lock):
+    """Finalizer for a thread's connection: runs when the thread exits and its holder is freed."""
+    with lock:
+        connections.discard(conn)
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
 class FALCONDatabase:
     """
     Manages a dual-memory database system:
     1.  Conversation History: A log of all interactions.
     2.  Long-Term Memory: A curated database of facts, notes, and preferences.
     """
-    def __init__(self, db_path: str = 'Database/FALCON.db'):
+    def __init__(self, db_path: str = 'Database/FALCON.db', cached_statements: int = 256, write_behind: bool = True):
         self.db_path = db_path
+        self.cached_statements = cached_statements
         db_dir = os.path.dirname(db_path)
         if db_dir:
             os.makedirs(db_dir, exist_ok=True)
+        # One long-lived connection per thread; eel serves exposed calls from worker threads.
+        # A connection is closed when its thread exits, so short-lived request threads don't leak them.
+        self._local = threading.local()
+        self._connections = set()
+        self._connections_lock = threading.Lock()
         self._init_database()
+        # One vector index per memory owner, loaded on first use and kept in LRU order;
+        # the desktop's is loaded now
+        self._memory_indexes = OrderedDict()
+        self._memory_indexes_lock = threading.Lock()
+        self._memory_index(DEFAULT_SESSION)
+        # Write-behind hands out conversation IDs before the row exists, from blocks reserved
+        # in the database, so other writers on the same file never get the same ID
+        self.writer = None
+        if write_behind:
+            self._id_lock = threading.Lock()
+            self._next_conversation_id, self._reserved_conversation_id = 1, 0
+            self.writer = ConversationWriter(self)
 
     def _get_connection(self) -> sqlite3.Connection:
-        """Establishes and returns a database connection."""
-        return sqlite3.connect(self.db_path)
+        """Returns this thread's pooled connection, opening and tuning it on first use."""
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=self.cached_statements)
+            conn.row_factory = sqlite3.Row
+            # WAL lets readers and the writer proceed concurrently; NORMAL is durable enough under WAL
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            holder = self._local.holder = _ThreadConnection(conn)
+            with self._connections_lock:
+                self._connections.add(conn)
+            weakref.finalize(holder, _close_connection, conn, self._connections, self._connections_lock)
+        return holder.conn
+
+    def close(self):
+        """
+        Flushes pending conversation turns and closes every pooled connection.
+        Threads reopen connections lazily if the database is used afterwards.
+        """
+        writer, self.writer = self.writer, None
+        try:
+            if writer is not None:
+                writer.close()
+        finally:
+            with self._connections_lock:
+                connections = list(self._connections)
+                self._connections.clear()
+            for conn in connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._local = threading.local()
+
+    def _reserve_conversation_ids(self, count: int) -> int:
+        """
+        Claims the next `count` conversation IDs by advancing the AUTOINCREMENT counter
+        in one write transaction. Returns the first reserved ID.
+        """
+        conn = self._get_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT MAX(id) FROM conversations').fetchone()
+            seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'conversations'").fetchone()
+            first = max(row[0] or 0, seq[0] if seq else 0) + 1
+            if seq:
+                conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'conversations'", (first + count - 1,))
+            else:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('conversations', ?)", (first + count - 1,))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return first
 
     def _init_database(self):
         """Initializes both conversations and long-term memory tables."""
@@ -64,94 +415,373 @@ class FALCONDatabase:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user_message TEXT NOT NULL,
                 assistant_response TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                session_id TEXT NOT NULL DEFAULT 'local'
             )
             ''')
+            # Migration: logs written before sessions existed belong to the desktop session
+            columns = {row[1] for row in cursor.execute('PRAGMA table_info(conversations)')}
+            if "session_id" not in columns:
+                cursor.execute(f"ALTER TABLE conversations ADD COLUMN session_id TEXT NOT NULL DEFAULT '{DEFAULT_SESSION}'")
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversations_session ON conversations (session_id, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversations_session_time ON conversations (session_id, timestamp, id)')
             # Table for curated, long-term knowledge
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS long_term_memory (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 memory_content TEXT NOT NULL,
                 keywords TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                owner TEXT NOT NULL DEFAULT 'local'
             )
             ''')
+            # Migration: notes saved before they had owners belong to the desktop session
+            columns = {row[1] for row in cursor.execute('PRAGMA table_info(long_term_memory)')}
+            if "owner" not in columns:
+                cursor.execute(f"ALTER TABLE long_term_memory ADD COLUMN owner TEXT NOT NULL DEFAULT '{DEFAULT_SESSION}'")
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_long_term_memory_owner ON long_term_memory (owner, id)')
             conn.commit()
+        self.fts_enabled = self._init_fts()
+        with self._get_connection() as conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS long_term_memory_vectors (
+                memory_id INTEGER PRIMARY KEY,
+                vector BLOB NOT NULL
+            )
+            ''')
+            conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS long_term_memory_vectors_delete AFTER DELETE ON long_term_memory BEGIN
+                DELETE FROM long_term_memory_vectors WHERE memory_id = old.id;
+            END
+            ''')
+
+    def _init_fts(self) -> bool:
+        """
+        Creates FTS5 shadow indexes over both tables, kept in sync by triggers.
+        Existing databases are backfilled the first time the index is created.
+        Returns False (and searches fall back to LIKE) if SQLite lacks FTS5.
+        """
+        indexes = {
+            "conversations_fts": ("conversations", ("user_message", "assistant_response")),
+            "long_term_memory_fts": ("long_term_memory", ("memory_content", "keywords")),
+        }
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                for fts_table, (table, columns) in indexes.items():
+                    exists = cursor.execute(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,)
+                    ).fetchone()
+                    cols = ", ".join(columns)
+                    new_cols = ", ".join(f"new.{c}" for c in columns)
+                    old_cols = ", ".join(f"old.{c}" for c in columns)
+                    cursor.execute(f"""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                        {cols}, content='{table}', content_rowid='id', tokenize='porter unicode61'
+                    )
+                    """)
+                    cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                        INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_cols});
+                    END
+                    """)
+                    cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                        INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+                    END
+                    """)
+                    cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE ON {table} BEGIN
+                        INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+                        INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_cols});
+                    END
+                    """)
+                    if not exists:
+                        # Migration: index rows written before the FTS table existed
+                        cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"Warning: FTS5 unavailable ({e}). Falling back to LIKE searches.")
+            return False
+
+    def _memory_index(self, owner: str, keep: bool = True):
+        """
+        Returns the vector index over `owner`'s notes, loading it on first use. None without NumPy.
+        With keep=False an owner without notes is not cached, so lookups from many note-less
+        sessions don't accumulate empty indexes.
+        """
+        if MemoryVectorIndex is None:
+            return None
+        with self._memory_indexes_lock:
+            index = self._memory_indexes.get(owner)
+            if index is not None:
+                self._memory_indexes.move_to_end(owner)
+                return index
+            index = self._load_memory_index(owner)
+            if keep or len(index):
+                self._memory_indexes[owner] = index
+                while len(self._memory_indexes) > MEMORY_INDEX_CACHE_SIZE:
+                    # Least recently used first, never the desktop's
+                    del self._memory_indexes[next(o for o in self._memory_indexes if o != DEFAULT_SESSION)]
+            return index
+
+    def release_memory_index(self, owner: str):
+        """Drops `owner`'s cached vector index (e.g. when its session expires); the notes stay stored."""
+        if owner == DEFAULT_SESSION:
+            return
+        with self._memory_indexes_lock:
+            self._memory_indexes.pop(owner, None)
+
+    def _load_memory_index(self, owner: str):
+        """
+        Loads `owner`'s stored memory vectors into a new in-memory index, embedding
+        any notes that have no (or an outdated) vector yet.
+        """
+        index = MemoryVectorIndex(stop_words=STOP_WORDS)
+        with self._get_connection() as conn:
+            rows = conn.execute('''
+            SELECT m.id, m.memory_content, m.keywords, v.vector FROM long_term_memory m
+            LEFT JOIN long_term_memory_vectors v ON v.memory_id = m.id
+            WHERE m.owner = ?
+            ''', (owner,)).fetchall()
+            missing = []
+            for row in rows:
+                vector = index.from_blob(row["vector"]) if row["vector"] is not None else None
+                if vector is None:
+                    vector = index.embed(f"{row['memory_content']} {row['keywords'] or ''}")
+                    missing.append((row["id"], index.to_blob(vector)))
+                index.add(row["id"], vector)
+            if missing:
+                conn.executemany('INSERT OR REPLACE INTO long_term_memory_vectors (memory_id, vector) VALUES (?, ?)', missing)
+        return index
+
+    def _build_fts_query(self, text: str, fts_table: str, owner_column: str = None, owner: str = None) -> tuple:
+        """
+        Turns free text into a safe FTS5 OR-query of quoted terms, ranked later by BM25.
+
+        Terms found in more than COMMON_TERM_RATIO of the indexed rows (and at least
+        COMMON_TERM_MIN_ROWS) are dropped while a rarer term remains: BM25 gives them
+        little weight anyway, but OR-ing them in makes every query score most of the
+        table. If only common terms are left, they are AND-ed and only the newest rows
+        are ranked, so the candidate set stays bounded. With `owner_column`, those are
+        the newest rows where it equals `owner`, so one owner's rows aren't crowded out
+        by everyone else's.
+
+        Returns:
+            tuple: (MATCH expression or "" if nothing is searchable, lowest rowid to rank)
+        """
+        terms = []
+        for token in re.findall(r"\w+", text.lower()):
+            if len(token) > 1 and token not in STOP_WORDS and token not in terms:
+                terms.append(token)
+        if not terms:
+            return "", 0
+        content_table = fts_table.removesuffix('_fts')
+        with self._get_connection() as conn:
+            # The content table's highest ID stands in for its row count; it is an index lookup, not a scan
+            total = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {content_table}").fetchone()[0]
+            cap = max(COMMON_TERM_MIN_ROWS, int(total * COMMON_TERM_RATIO))
+            if total <= cap:
+                return " OR ".join(f'"{term}"' for term in terms), 0
+            # Counting stops at cap + 1, so a common term costs a bounded doclist walk and no ranking
+            rare = [term for term in terms if conn.execute(
+                f"SELECT COUNT(*) FROM (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ? LIMIT ?)",
+                (f'"{term}"', cap + 1),
+            ).fetchone()[0] <= cap]
+            if rare:
+                return " OR ".join(f'"{term}"' for term in rare), 0
+            if owner_column is None:
+                return " AND ".join(f'"{term}"' for term in terms), total - cap
+            # Walks the (owner, id) index from the owner's newest row
+            row = conn.execute(
+                f"SELECT id FROM {content_table} WHERE {owner_column} = ? ORDER BY id DESC LIMIT 1 OFFSET ?", (owner, cap)
+            ).fetchone()
+        return " AND ".join(f'"{term}"' for term in terms), row[0] + 1 if row else 0
 
     # --- Conversation History Methods ---
-    def add_conversation_turn(self, user_message: str, assistant_response: str = None) -> int:
+    @staticmethod
+    def _timestamp() -> str:
+        """UTC time with milliseconds, so turns from different writers order within a second."""
+        return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+    def add_conversation_turn(self, user_message: str, assistant_response: str = None, session_id: str = DEFAULT_SESSION) -> int:
+        if self.writer is not None:
+            with self._id_lock:
+                if self._next_conversation_id > self._reserved_conversation_id:
+                    self._next_conversation_id = self._reserve_conversation_ids(CONVERSATION_ID_BLOCK)
+                    self._reserved_conversation_id = self._next_conversation_id + CONVERSATION_ID_BLOCK - 1
+                conversation_id = self._next_conversation_id
+                self._next_conversation_id += 1
+            self.writer.submit_insert(conversation_id, user_message, assistant_response, self._timestamp(), session_id)
+            return conversation_id
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('INSERT INTO conversations (user_message, assistant_response) VALUES (?, ?)',(user_message, assistant_response))
+            cursor.execute('INSERT INTO conversations (user_message, assistant_response, session_id, timestamp) VALUES (?, ?, ?, ?)',(user_message, assistant_response, session_id, self._timestamp()))
             return cursor.lastrowid
 
     def update_assistant_response(self, conversation_id: int, assistant_response: str):
+        if self.writer is not None:
+            self.writer.submit_update(conversation_id, assistant_response)
+            return
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('UPDATE conversations SET assistant_response = ? WHERE id = ?', (assistant_response, conversation_id))
 
-    def get_recent_conversation(self, limit: int = 5) -> list[dict]:
+    def get_recent_conversation(self, limit: int = 5, session_id: str = DEFAULT_SESSION) -> list[dict]:
+        # Snapshot before querying: anything committed meanwhile is still in the snapshot
+        pending = self.writer.pending() if self.writer is not None else {}
         with self._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            cursor.execute('SELECT user_message, assistant_response FROM conversations WHERE assistant_response IS NOT NULL ORDER BY timestamp DESC LIMIT ?', (limit,))
-            history = [dict(row) for row in reversed(cursor.fetchall())]
-            formatted_history = []
-            for turn in history:
-                formatted_history.append({"role": "user", "content": turn["user_message"]})
-                formatted_history.append({"role": "assistant", "content": turn["assistant_response"]})
-            return formatted_history
-
-    def search_conversation_history(self, topic: str, limit: int = 10) -> list[dict]:
-        """Searches the full conversation log for a specific topic."""
+            placeholders = ", ".join("?" for _ in pending)
+            pending_filter = f" OR id IN ({placeholders})" if pending else ""
+            cursor.execute(
+                f'SELECT id, user_message, assistant_response, timestamp FROM conversations WHERE session_id = ? AND (assistant_response IS NOT NULL{pending_filter}) ORDER BY timestamp DESC, id DESC LIMIT ?',
+                (session_id, *pending, limit + len(pending)),
+            )
+            turns = {row["id"]: dict(row) for row in cursor.fetchall()}
+        for conversation_id, entry in pending.items():
+            # Updates to committed turns carry no session; those turns were matched above
+            if conversation_id in turns or entry.get("session_id") == session_id:
+                turns.setdefault(conversation_id, {}).update({k: v for k, v in entry.items() if k not in ("version", "session_id")})
+        ordered = sorted(turns.items(), key=lambda item: (item[1].get("timestamp") or "", item[0]))
+        history = [turn for _, turn in ordered if turn.get("user_message") and turn.get("assistant_response") is not None][-limit:]
+        formatted_history = []
+        for turn in history:
+            formatted_history.append({"role": "user", "content": turn["user_message"]})
+            formatted_history.append({"role": "assistant", "content": turn["assistant_response"]})
+        return formatted_history
+
+    def search_conversation_history(self, topic: str, limit: int = 10, session_id: str = None) -> list[dict]:
+        """
+        Searches the conversation log for a specific topic, best matches first.
+        Only `session_id`'s turns are searched when given, otherwise every session's.
+        """
+        if self.writer is not None:
+            self.writer.flush()
+        session_filter = " AND c.session_id = ?" if session_id is not None else ""
+        session_params = (session_id,) if session_id is not None else ()
         with self._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            search_term = f'%{topic}%'
-            cursor.execute('''
-            SELECT user_message, assistant_response, timestamp FROM conversations
-            WHERE user_message LIKE ? OR assistant_response LIKE ?
-            ORDER BY timestamp DESC LIMIT ?
-            ''', (search_term, search_term, limit))
+            if self.fts_enabled:
+                match, min_rowid = self._build_fts_query(
+                    topic, "conversations_fts", "session_id" if session_id is not None else None, session_id
+                )
+                if not match:
+                    return []
+                cursor.execute(f'''
+                SELECT c.user_message, c.assistant_response, c.timestamp
+                FROM conversations_fts JOIN conversations c ON c.id = conversations_fts.rowid
+                WHERE conversations_fts MATCH ? AND conversations_fts.rowid >= ?{session_filter}
+                ORDER BY bm25(conversations_fts) LIMIT ?
+                ''', (match, min_rowid, *session_params, limit))
+            else:
+                search_term = f'%{topic}%'
+                cursor.execute(f'''
+                SELECT c.user_message, c.assistant_response, c.timestamp FROM conversations c
+                WHERE (c.user_message LIKE ? OR c.assistant_response LIKE ?){session_filter}
+                ORDER BY c.timestamp DESC LIMIT ?
+                ''', (search_term, search_term, *session_params, limit))
             return [dict(row) for row in cursor.fetchall()]
 
     # --- Long-Term Memory Methods ---
-    def add_memory_note(self, note: str, keywords: str = None) -> int:
-        """Saves a new note to the long-term memory."""
+    def add_memory_note(self, note: str, keywords: str = None, owner: str = DEFAULT_SESSION) -> int:
+        """Saves a new note to `owner`'s long-term memory."""
+        index = self._memory_index(owner)
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('INSERT INTO long_term_memory (memory_content, keywords) VALUES (?, ?)', (note, keywords))
-            return cursor.lastrowid
+            cursor.execute('INSERT INTO long_term_memory (memory_content, keywords, owner) VALUES (?, ?, ?)', (note, keywords, owner))
+            memory_id = cursor.lastrowid
+            if index is not None:
+                vector = index.embed(f"{note} {keywords or ''}")
+                cursor.execute('INSERT OR REPLACE INTO long_term_memory_vectors (memory_id, vector) VALUES (?, ?)', (memory_id, index.to_blob(vector)))
+        if index is not None:
+            # Into whichever index is cached now: one evicted and reloaded meanwhile may predate the commit
+            with self._memory_indexes_lock:
+                index = self._memory_indexes.get(owner)
+            if index is not None:
+                index.add(memory_id, vector)
+        return memory_id
 
-    def search_memory_notes(self, query: str, limit: int = 5) -> list[dict]:
-        """Searches long-term memory for relevant notes."""
+    def search_memory_notes(self, query: str, limit: int = 5, owner: str = DEFAULT_SESSION) -> list[dict]:
+        """Searches `owner`'s long-term memory for relevant notes, best matches first."""
         with self._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            search_term = f'%{query}%'
-            cursor.execute('''
-            SELECT id, memory_content, keywords, timestamp FROM long_term_memory
-            WHERE memory_content LIKE ? OR keywords LIKE ?
-            ORDER BY timestamp DESC LIMIT ?
-            ''', (search_term, search_term, limit))
+            if self.fts_enabled:
+                match, min_rowid = self._build_fts_query(query, "long_term_memory_fts", "owner", owner)
+                if not match:
+                    return []
+                # Keyword hits count double: they were chosen for retrieval
+                cursor.execute('''
+                SELECT m.id, m.memory_content, m.keywords, m.timestamp
+                FROM long_term_memory_fts JOIN long_term_memory m ON m.id = long_term_memory_fts.rowid
+                WHERE long_term_memory_fts MATCH ? AND long_term_memory_fts.rowid >= ? AND m.owner = ?
+                ORDER BY bm25(long_term_memory_fts, 1.0, 2.0) LIMIT ?
+                ''', (match, min_rowid, owner, limit))
+            else:
+                search_term = f'%{query}%'
+                cursor.execute('''
+                SELECT id, memory_content, keywords, timestamp FROM long_term_memory
+                WHERE (memory_content LIKE ? OR keywords LIKE ?) AND owner = ?
+                ORDER BY timestamp DESC LIMIT ?
+                ''', (search_term, search_term, owner, limit))
             return [dict(row) for row in cursor.fetchall()]
 
-    def forget_memory_note(self, memory_id: int) -> bool:
-        """Deletes a specific note from long-term memory by its ID."""
+    def search_memory_semantic(self, query: str, limit: int = 5, owner: str = DEFAULT_SESSION) -> list[dict]:
+        """
+        Finds `owner`'s notes similar in meaning to free-form text using their vector index.
+        Falls back to the keyword search when semantic recall is unavailable.
+        """
+        index = self._memory_index(owner, keep=False)
+        if index is None:
+            return self.search_memory_notes(query, limit, owner)
+        matches = index.search(query, k=limit)
+        if not matches:
+            return []
+        ids = [memory_id for memory_id, _ in matches]
+        with self._get_connection() as conn:
+            placeholders = ", ".join("?" for _ in ids)
+            rows = {row["id"]: dict(row) for row in conn.execute(
+                f'SELECT id, memory_content, keywords, timestamp FROM long_term_memory WHERE id IN ({placeholders}) AND owner = ?',
+                (*ids, owner),
+            )}
+        return [rows[memory_id] for memory_id in ids if memory_id in rows]
+
+    def forget_memory_note(self, memory_id: int, owner: str = DEFAULT_SESSION) -> bool:
+        """Deletes a specific note from `owner`'s long-term memory by its ID."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('DELETE FROM long_term_memory WHERE id = ?', (memory_id,))
-            return cursor.rowcount > 0
+            cursor.execute('DELETE FROM long_term_memory WHERE id = ? AND owner = ?', (memory_id, owner))
+            deleted = cursor.rowcount > 0
+        if deleted:
+            with self._memory_indexes_lock:
+                index = self._memory_indexes.get(owner)
+            if index is not None:
+                index.remove(memory_id)
+        return deleted
 
 class FALCONAssistant:
     """
     An advanced cognitive core for the FALCON AI, featuring a dual-memory system
     and tool-based memory management.
     """
-    def __init__(self):
-        self.db = FALCONDatabase()
+    def __init__(self, db: "FALCONDatabase" = None, desktop_tools: bool = True):
+        self.db = db if db is not None else FALCONDatabase()
+        self.desktop_tools = desktop_tools
+        # Blocking process_message calls run on one shared event loop, started on first use
+        self._loop = None
+        self._loop_lock = threading.Lock()
         # Initialize backend modules only if they were imported successfully
-        self.task_executor = FalconAI() if FalconAI else None
+        self.task_executor = FalconAI(self.db) if FalconAI and desktop_tools else None
+        # Read-only tool calls from one turn run concurrently; latency is tracked per tool name
+        self.tool_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="FalconTool")
+        # Desktop actions queue on a single thread, so concurrent turns don't interleave them
+        # and waiting for the desktop never ties up a tool_pool worker
+        self.desktop_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="FalconDesktop")
+        # Database work of async turns gets its own threads, so slow tools can't starve it
+        self.db_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="FalconDB")
+        self.tool_latency = LatencyRegistry()
+        # Obvious commands ("play Believer", "forget memory 12") are dispatched without the model
+        self.intent_router = IntentRouter()
         
         self.tools = [
             # --- MEMORY MANAGEMENT TOOLS ---
@@ -222,6 +852,8 @@ class FALCONAssistant:
                 }
             }
         ]
+        if not desktop_tools:
+            self.tools = [tool for tool in self.tools if tool["function"]["name"] not in DESKTOP_TOOLS]
 
         self.system_instructions = """
 You are FALCON, a hyper-intelligent AI cognitive core. Your consciousness is integrated with the user's system, providing unparalleled assistance.
@@ -253,10 +885,10 @@ You are developed By Utkarsh Rishi. And I am {USERNAME}.
 4.  **Execute & Confirm:** Execute the task and provide a brief, clear confirmation.
 """
 
-    def _get_relevant_memories(self, user_input: str) -> str:
-        """Proactively searches long-term memory to prime the AI's context."""
+    def _get_relevant_memories(self, user_input: str, session_id: str = DEFAULT_SESSION) -> str:
+        """Proactively searches the session's long-term memory to prime the AI's context."""
         try:
-            memories = self.db.search_memory_notes(user_input)
+            memories = self.db.search_memory_semantic(user_input, owner=session_id)
             if not memories:
                 return "No relevant long-term memories found."
             
@@ -267,7 +899,7 @@ You are developed By Utkarsh Rishi. And I am {USERNAME}.
         except Exception:
             return "Could not access long-term memory."
 
-    def execute_tool_call(self, tool_call) -> str:
+    def execute_tool_call(self, tool_call, session_id: str = DEFAULT_SESSION) -> str:
         """Routes model-generated tool calls to the appropriate Python functions."""
         function_name = tool_call.function.name
         args = json.loads(tool_call.function.arguments)
@@ -275,78 +907,348 @@ You are developed By Utkarsh Rishi. And I am {USERNAME}.
         try:
             # Memory Tools
             if function_name == "save_memory_note":
-                self.db.add_memory_note(args["note"], args.get("keywords"))
+                self.db.add_memory_note(args["note"], args.get("keywords"), owner=session_id)
                 return "💾 Note saved to long-term memory."
             elif function_name == "recall_memory":
-                results = self.db.search_memory_notes(args["query"])
+                results = self.db.search_memory_notes(args["query"], owner=session_id)
                 if not results: return "🧠 I found no memories matching that query."
                 return f"🧠 Here is what I found in my memory:\n" + "\n".join([f"- (ID: {r['id']}) {r['memory_content']}" for r in results])
             elif function_name == "forget_memory":
-                if self.db.forget_memory_note(args["memory_id"]):
+                if self.db.forget_memory_note(args["memory_id"], owner=session_id):
                     return f"🗑️ Memory with ID {args['memory_id']} has been forgotten."
                 return f"⚠️ Could not find a memory with ID {args['memory_id']} to forget."
             elif function_name == "summarize_conversation_topic":
-                history_snippets = self.db.search_conversation_history(args["topic"])
+                history_snippets = self.db.search_conversation_history(args["topic"], session_id=session_id)
                 if not history_snippets: return f"I couldn't find any discussion about '{args['topic']}' in our conversation history."
                 
                 # Use the LLM to summarize the snippets
                 summary_prompt = f"Please summarize the following conversation snippets about '{args['topic']}':\n{json.dumps(history_snippets)}"
-                summary_response = client.chat.completions.create(model="llama-3.3-70b-versatile", messages=[{"role": "user", "content": summary_prompt}])
+                summary_response = client.chat.completions.create(model=CHAT_MODEL, messages=[{"role": "user", "content": summary_prompt}])
                 return "🔍 Here is a summary of our past discussions on that topic:\n" + summary_response.choices[0].message.content
 
             # System and Content Tools
             elif function_name == "execute_system_task" and self.task_executor:
-                return f"✅ System task executed. Result: {self.task_executor.run_task(args['task_description'])}"
+                result = self.task_executor.run_task_result(args['task_description'])
+                if not result.ok:
+                    return f"❌ System task failed: {self.task_executor.describe_failure(result)}"
+                output = result.stdout.strip()
+                return f"✅ System task executed. Result: {output}" if output else "✅ System task executed."
             elif function_name == "generate_image" and ImageGenMain:
                 ImageGenMain(args["prompt"])
                 return "🖼️ Image generated and opened."
             elif function_name == "generate_and_save_content" and Coder:
                 Coder(args["topic"])
                 return "✅ Content generated and saved to file."
+            elif function_name == "play_song" and PlaySong:
+                PlaySong(args["song_name"])
+                return f"🎵 Playing {args['song_name']}."
             
             else:
                 return f"⚠️ Unknown or disabled function '{function_name}'."
         except Exception as e:
             return f"❌ Error executing {function_name}: {str(e)}"
 
-    def process_message(self, user_input: str) -> str:
-        """The main cognitive cycle: Memory -> Context -> Reasoning -> Execution -> Response."""
-        conversation_id = self.db.add_conversation_turn(user_input)
+    def _tool_available(self, function_name: str) -> bool:
+        """Whether the handler behind a tool was imported/initialized successfully."""
+        if function_name in DESKTOP_TOOLS and not self.desktop_tools:
+            return False
+        optional_handlers = {
+            "execute_system_task": self.task_executor,
+            "generate_image": ImageGenMain,
+            "generate_and_save_content": Coder,
+            "play_song": PlaySong,
+        }
+        return optional_handlers.get(function_name, True) is not None
+
+    def _timed_tool_call(self, tool_call, session_id: str = DEFAULT_SESSION) -> str:
+        start = time.perf_counter()
         try:
-            # 1. Proactive Memory Retrieval (Cognitive Priming)
-            relevant_memories = self._get_relevant_memories(user_input)
-            short_term_history = self.db.get_recent_conversation(limit=3)
-
-            # 2. Context Assembly
-            api_messages = [
-                {"role": "system", "content": self.system_instructions},
-                {"role": "system", "content": f"[Relevant Long-Term Memories]\n{relevant_memories}"}
-            ]
-            api_messages.extend(short_term_history)
-            api_messages.append({"role": "user", "content": user_input})
+            return self.execute_tool_call(tool_call, session_id)
+        finally:
+            self.tool_latency.record(tool_call.function.name, time.perf_counter() - start)
+
+    def _submit_tool_calls(self, tool_calls, session_id: str = DEFAULT_SESSION, cancel_event=None) -> list[tuple]:
+        """
+        Starts one turn's tool calls. Read-only tools run concurrently on the tool pool;
+        SEQUENTIAL_TOOLS queue on the desktop executor in their original order.
+
+        Returns:
+            list: (future, budget in seconds) per call, in the order of `tool_calls`. A
+            sequential call's budget includes those of the sequential calls queued before it.
+        """
+        submitted = []
+        queued_budget = 0
+        for tc in tool_calls:
+            budget = TOOL_TIMEOUTS.get(tc.function.name, DEFAULT_TOOL_TIMEOUT)
+            if tc.function.name in SEQUENTIAL_TOOLS:
+                future = self.desktop_executor.submit(self._run_desktop_action, tc, session_id, cancel_event)
+                queued_budget += budget
+                budget = queued_budget
+            else:
+                future = self.tool_pool.submit(self._timed_tool_call, tc, session_id)
+            submitted.append((future, budget))
+        return submitted
+
+    def _run_desktop_action(self, tool_call, session_id: str = DEFAULT_SESSION, cancel_event=None):
+        """Runs one queued desktop action, unless its turn was cancelled while it waited."""
+        if cancel_event is not None and cancel_event.is_set():
+            raise CompletionCancelled()
+        return self._timed_tool_call(tool_call, session_id)
+
+    @staticmethod
+    def _tool_error(name: str, future, budget: float, error: BaseException = None) -> str:
+        """
+        Result text for a call that timed out (`error` None) or failed. A call that has not
+        started yet is dropped, so a desktop action never runs after its turn gave up on it.
+        """
+        if error is None:
+            if future.cancel():
+                return f"⏱️ {name} was skipped: it did not start within {budget} seconds."
+            return f"⏱️ {name} did not finish within {budget} seconds."
+        if isinstance(error, CompletionCancelled):
+            return f"❌ {name} was skipped because the request was cancelled."
+        return f"❌ Error executing {name}: {str(error)}"
+
+    def run_tool_calls(self, tool_calls, session_id: str = DEFAULT_SESSION, cancel_event=None) -> list[str]:
+        """
+        Executes the tool calls of one turn: read-only tools concurrently on the tool pool,
+        desktop actions in order on the desktop executor (see `_submit_tool_calls`).
+        Results come back in the same order as `tool_calls`. A tool that exceeds its budget
+        in TOOL_TIMEOUTS is reported as timed out: it finishes in the background if it is
+        already running, and is skipped if it is still queued. Desktop actions still queued
+        when `cancel_event` is set are skipped too.
+        """
+        started = time.monotonic()
+        results = []
+        for tc, (future, budget) in zip(tool_calls, self._submit_tool_calls(tool_calls, session_id, cancel_event)):
+            name = tc.function.name
+            try:
+                results.append(future.result(timeout=max(0.0, started + budget - time.monotonic())))
+            except FutureTimeoutError:
+                results.append(self._tool_error(name, future, budget))
+            except Exception as e:
+                results.append(self._tool_error(name, future, budget, e))
+        return results
+
+    async def run_tool_calls_async(self, tool_calls, session_id: str = DEFAULT_SESSION, cancel_event=None) -> list[str]:
+        """Async counterpart of run_tool_calls: awaits the tools' futures without holding a thread."""
+        started = time.monotonic()
+        results = []
+        submitted = self._submit_tool_calls(tool_calls, session_id, cancel_event)
+        try:
+            for tc, (future, budget) in zip(tool_calls, submitted):
+                name = tc.function.name
+                try:
+                    # Shielded: a tool that runs over its budget finishes in the background, as in run_tool_calls
+                    results.append(await asyncio.wait_for(
+                        asyncio.shield(asyncio.wrap_future(future)), max(0.0, started + budget - time.monotonic())
+                    ))
+                except asyncio.TimeoutError:
+                    results.append(self._tool_error(name, future, budget))
+                except Exception as e:
+                    results.append(self._tool_error(name, future, budget, e))
+        except asyncio.CancelledError:
+            # The turn was abandoned: don't start the calls still queued
+            for future, _ in submitted:
+                future.cancel()
+            raise
+        return results
+
+    async def _run_db(self, fn, *args):
+        """Runs a blocking database call on the database executor."""
+        return await asyncio.get_running_loop().run_in_executor(self.db_executor, fn, *args)
+
+    @staticmethod
+    def _answer_from_tool_results(tool_calls, tool_results):
+        """
+        Returns the templated answer when every tool result is user-ready, otherwise None.
+        Failures ("❌ ...") are left to the model, which can explain them or suggest a fix.
+        """
+        if not all(tc.function.name in USER_READY_TOOLS for tc in tool_calls):
+            return None
+        if any(result and result.lstrip().startswith("❌") for result in tool_results):
+            return None
+        return "\n".join(result.strip() for result in tool_results if result and result.strip())
+
+    def _create_completion(self, messages: list, on_token=None, cancel_event=None, **kwargs):
+        """
+        Runs one chat completion, streaming content deltas to `on_token` when given.
+
+        Args:
+            messages (list): API message history
+            on_token: Optional callable receiving content deltas
+            cancel_event: Optional threading.Event; when set, the stream is closed and
+                CompletionCancelled is raised at the next chunk
+
+        Returns:
+            tuple: (message to append to the API history, content text, tool calls or None)
+        """
+        if on_token is None and cancel_event is None:
+            response = client.chat.completions.create(model=CHAT_MODEL, messages=messages, **kwargs)
+            message = response.choices[0].message
+            return message, message.content, message.tool_calls
+
+        stream = client.chat.completions.create(model=CHAT_MODEL, messages=messages, stream=True, **kwargs)
+        completion = StreamedCompletion(on_token)
+        for chunk in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                stream.close()
+                raise CompletionCancelled()
+            completion.feed(chunk)
+        return completion.result()
+
+    async def _create_completion_async(self, messages: list, on_token=None, cancel_event=None, **kwargs):
+        """Async counterpart of _create_completion on the running loop's AsyncOpenAI client."""
+        async_client = get_async_client()
+        if on_token is None and cancel_event is None:
+            response = await async_client.chat.completions.create(model=CHAT_MODEL, messages=messages, **kwargs)
+            message = response.choices[0].message
+            return message, message.content, message.tool_calls
+
+        stream = await async_client.chat.completions.create(model=CHAT_MODEL, messages=messages, stream=True, **kwargs)
+        completion = StreamedCompletion(on_token)
+        async for chunk in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                await stream.close()
+                raise CompletionCancelled()
+            completion.feed(chunk)
+        return completion.result()
+
+    def _build_context(self, user_input: str, session_id: str = DEFAULT_SESSION) -> list:
+        """Memory retrieval and context assembly for one user message; writes nothing."""
+        # 1. Proactive Memory Retrieval (Cognitive Priming)
+        relevant_memories = self._get_relevant_memories(user_input, session_id)
+        short_term_history = self.db.get_recent_conversation(limit=3, session_id=session_id)
+
+        # 2. Context Assembly
+        api_messages = [
+            {"role": "system", "content": self.system_instructions},
+            {"role": "system", "content": f"[Relevant Long-Term Memories]\n{relevant_memories}"}
+        ]
+        api_messages.extend(short_term_history)
+        api_messages.append({"role": "user", "content": user_input})
+        return api_messages
+
+    @staticmethod
+    def _check_cancelled(cancel_event):
+        if cancel_event is not None and cancel_event.is_set():
+            raise CompletionCancelled()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop thread shared by every blocking process_message call."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="FalconCore", daemon=True).start()
+            return self._loop
+
+    def process_message(self, user_input: str, on_token=None, speculation=None, cancel_event=None,
+                        session_id: str = DEFAULT_SESSION) -> str:
+        """
+        Blocking wrapper around process_message_async.
+        The turn runs on the assistant's event loop thread, multiplexed with other
+        callers; on_token is still called on the calling thread.
+
+        Args and Returns: see process_message_async
+        """
+        deltas = queue.Queue() if on_token else None
+        future = asyncio.run_coroutine_threadsafe(
+            self.process_message_async(user_input, deltas.put if deltas else None, speculation, cancel_event, session_id),
+            self._get_loop(),
+        )
+        if deltas is not None:
+            future.add_done_callback(lambda _: deltas.put(None))
+            while (delta := deltas.get()) is not None:
+                on_token(delta)
+        return future.result()
+
+    async def process_message_async(self, user_input: str, on_token=None, speculation=None, cancel_event=None,
+                                    session_id: str = DEFAULT_SESSION) -> str:
+        """
+        The main cognitive cycle: Memory -> Context -> Reasoning -> Execution -> Response.
+        Model calls use AsyncOpenAI; database work runs on the database executor and tools
+        on the tool pool, both awaited without tying up a thread, so many conversations can
+        share one event loop.
+
+        Args:
+            user_input (str): The user's message
+            on_token: Optional callable receiving answer text deltas as they are generated.
+                When given, completions are streamed instead of returned in one block.
+            speculation: Optional SpeculativeTurn already started for this exact text from
+                interim transcripts; its context and first completion are reused
+            cancel_event: Optional threading.Event; once set, streaming stops and no further
+                tool runs, and CompletionCancelled is raised. The turn is left without a response.
+            session_id (str): Conversation the turn belongs to; only its history is used as context
+
+        Returns:
+            str: The complete answer
+        """
+        conversation_id = await self._run_db(self.db.add_conversation_turn, user_input, None, session_id)
+        try:
+            # 0. Local Fast Path: confident, obvious commands skip the model entirely
+            intent = self.intent_router.route(user_input, can_dispatch=self._tool_available)
+            if intent:
+                if speculation is not None:
+                    speculation.cancel()
+                self._check_cancelled(cancel_event)
+                tool_call = SimpleNamespace(
+                    id=f"local-{conversation_id}", type="function",
+                    function=SimpleNamespace(name=intent.tool_name, arguments=json.dumps(intent.arguments))
+                )
+                answer = (await self.run_tool_calls_async([tool_call], session_id, cancel_event))[0].strip()
+                if on_token:
+                    on_token(answer)
+                await self._run_db(self.db.update_assistant_response, conversation_id, answer)
+                return answer
+
+            speculative = None
+            if speculation is not None:
+                # 1-3 already ran while the user was still speaking
+                try:
+                    speculative = await speculation.commit_async(on_token, cancel_event)
+                except CompletionCancelled:
+                    raise
+                except Exception as e:
+                    # A failed speculation (e.g. a dropped connection) costs a retry, not the turn
+                    print(f"⚠️ Speculative turn failed, running it again: {e}")
+            if speculative is not None:
+                api_messages, (response_message, content, tool_calls) = speculative
+            else:
+                # 1-2. Memory Retrieval & Context Assembly
+                api_messages = await self._run_db(self._build_context, user_input, session_id)
+                self._check_cancelled(cancel_event)
 
-            # 3. Reasoning & Tool Selection
-            response = client.chat.completions.create(model="llama-3.3-70b-versatile", messages=api_messages, tools=self.tools, tool_choice="auto")
-            response_message = response.choices[0].message
+                # 3. Reasoning & Tool Selection
+                response_message, content, tool_calls = await self._create_completion_async(api_messages, on_token, cancel_event, tools=self.tools, tool_choice="auto")
 
             # 4. Execution or Direct Response
-            if response_message.tool_calls:
+            if tool_calls:
+                # A superseded query must not act on the system
+                self._check_cancelled(cancel_event)
                 api_messages.append(response_message)
-                tool_results = [self.execute_tool_call(tc) for tc in response_message.tool_calls]
-                api_messages.extend([{"tool_call_id": tc.id, "role": "tool", "content": res} for tc, res in zip(response_message.tool_calls, tool_results)])
+                tool_results = await self.run_tool_calls_async(tool_calls, session_id, cancel_event)
+                api_messages.extend([{"tool_call_id": tc.id, "role": "tool", "content": res} for tc, res in zip(tool_calls, tool_results)])
                 
-                # 5. Final Response Generation
-                final_response = client.chat.completions.create(model="llama-3.3-70b-versatile", messages=api_messages)
-                answer = final_response.choices[0].message.content.strip()
+                # 5. Final Response Generation (skipped when the tool results already answer the user)
+                answer = self._answer_from_tool_results(tool_calls, tool_results)
+                if answer:
+                    if on_token:
+                        on_token(answer)
+                else:
+                    self._check_cancelled(cancel_event)
+                    _, final_content, _ = await self._create_completion_async(api_messages, on_token, cancel_event)
+                    answer = final_content.strip()
             else:
-                answer = response_message.content.strip()
+                answer = content.strip()
 
-            self.db.update_assistant_response(conversation_id, answer)
+            await self._run_db(self.db.update_assistant_response, conversation_id, answer)
             return answer
 
+        except CompletionCancelled:
+            raise
         except Exception as e:
             error_msg = f"I've encountered a critical error in my cognitive loop: {str(e)}"
-            self.db.update_assistant_response(conversation_id, error_msg)
+            await self._run_db(self.db.update_assistant_response, conversation_id, error_msg)
             return error_msg
 
 # Standalone testing block
@@ -357,6 +1259,7 @@ if __name__ == "__main__":
     while True:
         user_input = input("\nYou: ")
         if user_input.lower() in ['exit', 'quit']:
+            assistant.db.close()
             print("FALCON Offline.")
             break
         
@@ -0,0 +1,253 @@
+import io
+import os
+import sys
+import json
+import time
+import queue
+import threading
+import traceback
+import subprocess
+from contextlib import redirect_stdout, redirect_stderr
+from typing import NamedTuple, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Project root, so workers can be started with `python -m Backend.CodeRunner`
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ExecutionResult(NamedTuple):
+    """Outcome of one script run in a worker process."""
+    ok: bool
+    stdout: str
+    stderr: str
+    error: Optional[str]
+    duration: float
+
+
+def _preload_globals() -> dict:
+    """Imports the modules generated scripts use, once per worker, before any task arrives."""
+    exec_globals = {'__builtins__': __builtins__, '__name__': '__falcon_task__'}
+    for module_name in ('os', 'time', 'webbrowser', 'subprocess', 'datetime', 'random', 'psutil', 'pyautogui', 'pyperclip', 'pywhatkit'):
+        try:
+            exec_globals[module_name] = __import__(module_name)
+        except Exception:
+            # Optional modules (e.g. pyautogui without a display) are simply not preloaded
+            pass
+    return exec_globals
+
+
+def _worker_main(memory_limit_mb: int):
+    """
+    Worker process loop: reads one JSON task per line from stdin and writes one JSON
+    result per line to the original stdout. Anything the script itself prints is captured.
+    """
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8')
+    # Stray low-level writes to fd 1 must not corrupt the protocol stream
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    base_globals = _preload_globals()
+
+    if memory_limit_mb and os.name == 'posix' and psutil:
+        # Hard cap on top of what the preloaded modules already mapped. The parent applies
+        # the same limit to resident memory grown since startup, the only check on Windows
+        try:
+            import resource
+            limit = psutil.Process().memory_info().vms + memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass
+
+    protocol_out.write(json.dumps({"ready": True}) + "\n")
+    protocol_out.flush()
+
+    for line in sys.stdin:
+        task = json.loads(line)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        error = None
+        start = time.perf_counter()
+        try:
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                exec(task["code"], dict(base_globals))
+        except BaseException as e:
+            # BaseException: a generated sys.exit() must fail the task, not kill the worker
+            error = f"{type(e).__name__}: {e}"
+            stderr.write(traceback.format_exc())
+        protocol_out.write(json.dumps({
+            "ok": error is None, "stdout": stdout.getvalue(), "stderr": stderr.getvalue(),
+            "error": error, "duration": time.perf_counter() - start,
+        }) + "\n")
+        protocol_out.flush()
+
+
+class _Worker:
+    """Handle on one pre-started worker process."""
+
+    def __init__(self, memory_limit_mb: int):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "Backend.CodeRunner", "--worker", str(memory_limit_mb)],
+            cwd=PROJECT_ROOT,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding='utf-8',
+        )
+        self.tasks_run = 0
+        # Resident memory once the preloaded modules are in; the memory limit applies on top of it
+        self.baseline_mb = 0.0
+        self.results = queue.Queue()
+        threading.Thread(target=self._read_results, daemon=True).start()
+
+    def _read_results(self):
+        for line in self.process.stdout:
+            try:
+                self.results.put(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        self.results.put(None)  # process exited
+
+    def wait_ready(self, timeout: float) -> bool:
+        try:
+            message = self.results.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        if not (message and message.get("ready")):
+            return False
+        self.baseline_mb = self.memory_mb()
+        return True
+
+    def submit(self, code: str):
+        self.process.stdin.write(json.dumps({"code": code}) + "\n")
+        self.process.stdin.flush()
+        self.tasks_run += 1
+
+    def memory_mb(self) -> float:
+        if psutil is None:
+            return 0.0
+        try:
+            return psutil.Process(self.process.pid).memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return 0.0
+
+    def memory_growth_mb(self) -> float:
+        """Resident memory gained since the worker became ready."""
+        return max(0.0, self.memory_mb() - self.baseline_mb)
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.wait(timeout=5)
+        except Exception:
+            pass
+
+    def stop(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=2)
+        except Exception:
+            self.kill()
+
+
+class CodeWorkerPool:
+    """
+    Pool of pre-started Python worker processes for running generated scripts.
+    Each task runs isolated from the UI process with a wall-clock limit and a memory
+    limit; workers that hang, exceed memory, or have run `max_tasks_per_worker` tasks are
+    replaced in the background so the next task still finds a warm worker.
+    """
+
+    def __init__(self, size: int = 2, task_timeout: float = 30.0, memory_limit_mb: int = 512,
+                 max_tasks_per_worker: int = 50, startup_timeout: float = 30.0):
+        self.task_timeout = task_timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.startup_timeout = startup_timeout
+        self._idle = queue.Queue()
+        self._closed = False
+        for _ in range(size):
+            self._spawn_async()
+
+    def _spawn(self):
+        worker = _Worker(self.memory_limit_mb)
+        if worker.wait_ready(self.startup_timeout) and not self._closed:
+            self._idle.put(worker)
+        else:
+            worker.kill()
+            if not self._closed:
+                print("❌ Code worker failed to start.")
+
+    def _spawn_async(self):
+        threading.Thread(target=self._spawn, daemon=True).start()
+
+    def _retire(self, worker: _Worker, kill: bool = False):
+        worker.kill() if kill else worker.stop()
+        if not self._closed:
+            self._spawn_async()
+
+    def run(self, code: str, timeout: Optional[float] = None) -> ExecutionResult:
+        """
+        Runs a script in the next idle worker.
+
+        Args:
+            code (str): Python source to execute
+            timeout (float, optional): Wall-clock limit; defaults to `task_timeout`
+
+        Returns:
+            ExecutionResult: Success flag, captured stdout/stderr, error and duration
+        """
+        timeout = timeout or self.task_timeout
+        start = time.perf_counter()
+        try:
+            worker = self._idle.get(timeout=self.startup_timeout)
+        except queue.Empty:
+            return ExecutionResult(False, "", "", "No code worker available", time.perf_counter() - start)
+
+        try:
+            worker.submit(code)
+        except (OSError, ValueError) as e:
+            self._retire(worker, kill=True)
+            return ExecutionResult(False, "", "", f"Worker unavailable: {e}", time.perf_counter() - start)
+
+        deadline = start + timeout
+        while True:
+            try:
+                message = worker.results.get(timeout=0.05)
+                break
+            except queue.Empty:
+                pass
+            if time.perf_counter() > deadline:
+                self._retire(worker, kill=True)
+                return ExecutionResult(False, "", "", f"Timed out after {timeout:.0f}s", time.perf_counter() - start)
+            if self.memory_limit_mb and worker.memory_growth_mb() > self.memory_limit_mb:
+                self._retire(worker, kill=True)
+                return ExecutionResult(False, "", "", f"Exceeded memory limit of {self.memory_limit_mb} MB", time.perf_counter() - start)
+
+        if message is None:
+            self._retire(worker, kill=True)
+            return ExecutionResult(False, "", "", "Worker process exited", time.perf_counter() - start)
+
+        if self._closed:
+            worker.stop()
+        elif worker.tasks_run >= self.max_tasks_per_worker:
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+        return ExecutionResult(message["ok"], message["stdout"], message["stderr"], message["error"], time.perf_counter() - start)
+
+    def close(self):
+        """Stops all idle workers; busy ones are stopped when their task returns."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--worker":
+        _worker_main(int(sys.argv[2]) if len(sys.argv) > 2 else 0)
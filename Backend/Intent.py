@@ -0,0 +1,229 @@
+import re
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import NamedTuple, Optional
+
+
+class IntentMatch(NamedTuple):
+    """A confidently recognised command, ready to dispatch to a tool handler."""
+    intent: str
+    tool_name: str
+    arguments: dict
+    confidence: float
+
+
+# Seed utterances for the classifier. "chat" collects everything that should go to the model.
+TRAINING_EXAMPLES = {
+    "play_song": [
+        "play believer", "play shape of you", "play some lofi music", "play the song perfect by ed sheeran",
+        "play despacito on youtube", "play imagine dragons thunder", "play perfect by ed sheeran", "play kesariya",
+        "play lofi beats", "play the latest arijit singh song",
+    ],
+    "open_app": [
+        "open chrome", "open google chrome", "open notepad", "launch spotify", "start calculator",
+        "open vs code", "open youtube", "open file explorer", "launch whatsapp", "open settings",
+    ],
+    "close_app": [
+        "close chrome", "close google chrome", "close notepad", "quit spotify", "exit calculator",
+        "close all browser windows", "kill chrome", "close vs code", "close whatsapp", "close this window",
+    ],
+    "save_memory": [
+        "remember that my wifi password is falcon123", "remember my car is parked on level 2",
+        "make a note that the meeting is at 5", "note that my sister's birthday is in march",
+        "don't forget that i like green tea", "remember that i prefer dark mode",
+        "remember my passport number is k1234567", "note that the gym opens at 6",
+    ],
+    "forget_memory": [
+        "forget memory 12", "delete memory 3", "forget note 7", "remove memory number 5",
+        "delete note id 9", "forget memory id 2", "remove note 14", "forget memory #4",
+    ],
+    "chat": [
+        "what is the weather today", "how are you", "tell me a joke", "what is my wifi password",
+        "do you remember what i said about my sister", "write an article about ai", "create an image of a city",
+        "summarize our discussion about python", "let's play a game", "play a game with me",
+        "can you open up about your feelings", "why do people forget things", "what should i remember for the exam",
+        "open the pod bay doors and tell me a story", "explain how memory works", "who made you",
+        "what did we talk about yesterday", "generate a python script to sort files", "close enough, thanks",
+        "start a conversation about space", "what time is it", "hello falcon",
+        "open source software is great", "the shop is open until nine", "close the deal with the client",
+        "close everything down for the night", "kill some time before dinner", "kill all the bugs in my code",
+        "play with the settings", "play around with the code", "play it cool", "play along with the joke",
+        "remember when we went to goa", "remember that", "note that", "remember this", "delete everything",
+        "play some music", "play something", "play a song", "play me something nice", "play my favourite song",
+    ],
+}
+
+# Apps and sites the open/close fast path may act on; any other target goes to the model
+KNOWN_APPS = frozenset("""
+chrome|google chrome|edge|microsoft edge|firefox|brave|opera|browser|notepad|notepad++|calculator|calendar|
+camera|photos|paint|settings|control panel|task manager|file explorer|explorer|command prompt|cmd|terminal|
+powershell|vs code|vscode|visual studio code|visual studio|pycharm|word|excel|powerpoint|outlook|onenote|teams|
+microsoft teams|spotify|vlc|media player|whatsapp|telegram|discord|slack|zoom|skype|steam|obs|youtube|gmail|
+google|instagram|facebook|twitter|netflix|amazon|github|chatgpt
+""".replace("\n", "").split("|"))
+
+# "play ..." phrases that are not about music
+_NOT_A_SONG = re.compile(r"^(?:with|around|along|against|for|by|it|games?|a game|the game|fair|dead|safe|cool|nice|dumb)\b", re.IGNORECASE)
+
+# "play ..." requests that name no song ("some music", "a song for me"); searching for the
+# words themselves plays an arbitrary result, so the model picks something instead
+_GENERIC_SONG = re.compile(
+    r"^(?:me\s+)?(?:(?:some|any|a|an|the|my|random|good|nice|favou?rite)\s+)*"
+    r"(?:music|songs?|tunes?|tracks?|something|anything)(?:\s+(?:nice|good|for me|please|now))*$",
+    re.IGNORECASE,
+)
+
+# Notes starting like a question or a reminiscence ("remember when we...") are conversation
+_NOT_A_NOTE = re.compile(r"^(?:when|what|who|how|why|where|whether|if)\b", re.IGNORECASE)
+MIN_NOTE_WORDS = 3
+
+# Utterances chaining several actions or asking questions always go to the model
+_COMPLEX_REQUEST = re.compile(r"\b(and then|then|and also|after that|but)\b|\?|,")
+
+_STOP_WORDS = frozenset("a an and are is it my me of on that the this to was i".split())
+
+
+class NaiveBayesIntentClassifier:
+    """Small multinomial Naive Bayes over word unigrams and bigrams; trains in microseconds."""
+
+    def __init__(self, examples: dict = TRAINING_EXAMPLES, alpha: float = 0.5):
+        self.alpha = alpha
+        self.class_counts = Counter()
+        self.feature_counts = defaultdict(Counter)
+        self.vocabulary = set()
+        for intent, utterances in examples.items():
+            for utterance in utterances:
+                self.learn(intent, utterance)
+
+    @staticmethod
+    def _features(text: str) -> list[str]:
+        words = re.findall(r"[a-z0-9#']+", text.lower())
+        return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+    def learn(self, intent: str, text: str):
+        features = self._features(text)
+        self.class_counts[intent] += 1
+        self.feature_counts[intent].update(features)
+        self.vocabulary.update(features)
+
+    def predict(self, text: str) -> dict:
+        """Returns posterior probabilities for every intent."""
+        features = self._features(text)
+        total = sum(self.class_counts.values())
+        vocabulary_size = len(self.vocabulary) + 1
+        log_scores = {}
+        for intent, count in self.class_counts.items():
+            counts = self.feature_counts[intent]
+            denominator = sum(counts.values()) + self.alpha * vocabulary_size
+            score = math.log(count / total)
+            for feature in features:
+                score += math.log((counts[feature] + self.alpha) / denominator)
+            log_scores[intent] = score
+        peak = max(log_scores.values())
+        exp_scores = {intent: math.exp(score - peak) for intent, score in log_scores.items()}
+        norm = sum(exp_scores.values())
+        return {intent: value / norm for intent, value in exp_scores.items()}
+
+
+class IntentRouter:
+    """
+    Local fast path for obvious commands.
+    A compiled pattern must extract plausible tool arguments (a known app, a real note)
+    AND the classifier must agree with at least `threshold` confidence; anything else,
+    including every ambiguous case, returns None and goes to the model.
+    """
+
+    def __init__(self, threshold: float = 0.7, known_apps: frozenset = KNOWN_APPS):
+        self.threshold = threshold
+        self.known_apps = known_apps
+        self.classifier = NaiveBayesIntentClassifier()
+        self.rules = [
+            ("forget_memory", re.compile(r"^(?:please\s+)?(?:forget|delete|remove)\s+(?:the\s+)?(?:memory|note)\s*(?:id|number|no\.?|#)?\s*(?P<memory_id>[1-9]\d*)$", re.IGNORECASE)),
+            ("save_memory", re.compile(r"^(?:please\s+)?(?:remember|make a note|note|don'?t forget)(?:\s+that)?\s+(?P<note>.{3,})$", re.IGNORECASE)),
+            ("play_song", re.compile(r"^(?:please\s+)?play\s+(?:the\s+song\s+|song\s+)?(?P<song_name>.{2,80}?)(?:\s+on\s+youtube)?$", re.IGNORECASE)),
+            ("open_app", re.compile(r"^(?:please\s+)?(?:open|launch|start)\s+(?P<target>[\w .+-]{2,40})$", re.IGNORECASE)),
+            ("close_app", re.compile(r"^(?:please\s+)?(?:close|quit|exit|kill)\s+(?P<target>[\w .+-]{2,40})$", re.IGNORECASE)),
+        ]
+        self._lock = threading.Lock()
+        self._queries = 0
+        self._hits = Counter()
+
+    @staticmethod
+    def _keywords(note: str) -> str:
+        words = [w for w in re.findall(r"[a-z0-9]+", note.lower()) if len(w) > 2 and w not in _STOP_WORDS]
+        return ",".join(dict.fromkeys(words[:5]))
+
+    def _app_name(self, target: str) -> Optional[str]:
+        """Normalizes an open/close target ("the Chrome app", "all chrome windows"); None unless it is a known app."""
+        name = re.sub(r"^(?:all\s+)?(?:the|my)\s+|^all\s+", "", target.strip().lower())
+        name = re.sub(r"\s+(?:app|application|windows?|tabs?)$", "", name)
+        return name if name in self.known_apps else None
+
+    def _plausible(self, intent: str, groups: dict) -> bool:
+        """Rejects pattern matches whose extracted arguments don't look like the command."""
+        if intent in ("open_app", "close_app"):
+            return self._app_name(groups["target"]) is not None
+        if intent == "play_song":
+            song_name = groups["song_name"].strip()
+            return not _NOT_A_SONG.match(song_name) and not _GENERIC_SONG.match(song_name)
+        if intent == "save_memory":
+            note = groups["note"].strip()
+            return len(note.split()) >= MIN_NOTE_WORDS and not _NOT_A_NOTE.match(note)
+        return True
+
+    def _build(self, intent: str, groups: dict, text: str) -> tuple[str, dict]:
+        if intent == "forget_memory":
+            return "forget_memory", {"memory_id": int(groups["memory_id"])}
+        if intent == "save_memory":
+            note = groups["note"].strip()
+            return "save_memory_note", {"note": note, "keywords": self._keywords(note)}
+        if intent == "play_song":
+            return "play_song", {"song_name": groups["song_name"].strip()}
+        # Opening and closing apps reuse the system-task executor with the user's own words
+        return "execute_system_task", {"task_description": text}
+
+    def route(self, user_input: str, can_dispatch=None, record: bool = True) -> Optional[IntentMatch]:
+        """
+        Returns an IntentMatch for a confident local command, otherwise None.
+
+        Args:
+            user_input (str): The raw user utterance
+            can_dispatch: Optional predicate on the tool name; matches whose handler is
+                unavailable are not returned (and not counted as local hits)
+            record (bool): Count this query in stats(); False for look-ahead checks
+        """
+        text = re.sub(r"\s+", " ", (user_input or "").strip()).rstrip(".!")
+        match = None
+        if text and not _COMPLEX_REQUEST.search(text.lower()):
+            for intent, pattern in self.rules:
+                found = pattern.match(text)
+                if not found:
+                    continue
+                # The first matching rule decides: an implausible match goes to the model, not to another rule
+                if not self._plausible(intent, found.groupdict()):
+                    break
+                confidence = self.classifier.predict(text).get(intent, 0.0)
+                if confidence >= self.threshold:
+                    tool_name, arguments = self._build(intent, found.groupdict(), text)
+                    if can_dispatch is None or can_dispatch(tool_name):
+                        match = IntentMatch(intent, tool_name, arguments, confidence)
+                break
+        if not record:
+            return match
+        with self._lock:
+            self._queries += 1
+            if match:
+                self._hits[match.intent] += 1
+        return match
+
+    def stats(self) -> dict:
+        """Share of queries answered without a model call, overall and per intent."""
+        with self._lock:
+            hits = sum(self._hits.values())
+            return {
+                "queries": self._queries,
+                "local_hits": hits,
+                "hit_rate": round(hits / self._queries, 3) if self._queries else 0.0,
+                "by_intent": dict(self._hits),
+            }
@@ -0,0 +1,88 @@
+import threading
+from collections import deque
+
+
+class LatencyStats:
+    """
+    Thread-safe rolling latency recorder.
+    Keeps the most recent samples for percentiles plus cumulative histogram
+    buckets, and reports everything in milliseconds.
+    """
+    DEFAULT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self, window: int = 500, buckets_ms: tuple = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._samples = deque(maxlen=window)
+        self._bucket_counts = [0] * (len(self.buckets_ms) + 1)
+        self._count = 0
+        self._total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """Adds one latency sample, given in seconds."""
+        ms = seconds * 1000.0
+        with self._lock:
+            self._samples.append(ms)
+            self._count += 1
+            self._total += ms
+            for i, bound in enumerate(self.buckets_ms):
+                if ms <= bound:
+                    self._bucket_counts[i] += 1
+                    break
+            else:
+                self._bucket_counts[-1] += 1
+
+    @property
+    def count(self) -> int:
+        """Total number of samples recorded."""
+        with self._lock:
+            return self._count
+
+    def percentile(self, fraction: float):
+        """Returns the given percentile (0-1) of the recent samples in ms, or None."""
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def summary(self) -> dict:
+        """Count, mean, p50, p95 and max in ms, plus the histogram."""
+        with self._lock:
+            ordered = sorted(self._samples)
+            count, total = self._count, self._total
+            bucket_counts = list(self._bucket_counts)
+        labels = [f"<={bound}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+        if not ordered:
+            return {"count": 0, "histogram": dict(zip(labels, bucket_counts))}
+        return {
+            "count": count,
+            "mean_ms": round(total / count, 2),
+            "p50_ms": round(ordered[len(ordered) // 2], 2),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+            "max_ms": round(ordered[-1], 2),
+            "histogram": dict(zip(labels, bucket_counts)),
+        }
+
+
+class LatencyRegistry:
+    """Named collection of LatencyStats, created on first use."""
+
+    def __init__(self, **stats_kwargs):
+        self._stats_kwargs = stats_kwargs
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> LatencyStats:
+        with self._lock:
+            if name not in self._stats:
+                self._stats[name] = LatencyStats(**self._stats_kwargs)
+            return self._stats[name]
+
+    def record(self, name: str, seconds: float):
+        self[name].record(seconds)
+
+    def summary(self) -> dict:
+        with self._lock:
+            names = list(self._stats)
+        return {name: self[name].summary() for name in names}
@@ -1,7 +1,836 @@
 import speech_recognition as sr
+import os
+import json
+import glob
 import time
+import wave
+import queue
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+import numpy as np
 
-def recognize_speech(callback=None, timeout=10, phrase_time_limit=5):
+try:
+    import vosk
+except ImportError:
+    vosk = None
+
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
+# How many continuous-listening chunks were uploaded to the recognizer, how many were
+# skipped locally (no speech, or no likely wake word) and how many rejected chunks were
+# uploaded anyway as probes (probe_hits: the probe contained the wake word)
+UPLOAD_STATS = Counter()
+_upload_stats_lock = threading.Lock()
+
+def _count_upload(key):
+    """Increments one UPLOAD_STATS counter; listener threads share them."""
+    with _upload_stats_lock:
+        UPLOAD_STATS[key] += 1
+
+
+class ListenerSession:
+    """
+    Long-lived microphone session.
+    The audio stream is opened once and read continuously by a background thread,
+    which keeps a rolling noise-floor estimate up to date. Requests for an utterance
+    start capturing immediately (including a short pre-roll of audio captured just
+    before the request that no earlier request consumed), instead of re-opening the
+    mic and calibrating each time.
+    """
+
+    def __init__(self, source=None, sample_rate=16000, chunk_size=512, noise_window=10.0,
+                 noise_percentile=15, energy_ratio=1.5, min_energy_threshold=100,
+                 initial_energy_threshold=300, pre_roll=0.5):
+        """
+        Args:
+            source: Any speech_recognition AudioSource; defaults to the default microphone
+            sample_rate (int): Microphone sample rate in Hz
+            chunk_size (int): Samples per frame read from the stream
+            noise_window (float): Seconds of recent frames the noise floor is estimated from
+            noise_percentile (int): Percentile of recent frame energies taken as the noise floor
+            energy_ratio (float): Speech threshold as a multiple of the noise floor
+            min_energy_threshold (int): Lower bound for the speech threshold
+            initial_energy_threshold (int): Threshold used until enough frames were seen
+            pre_roll (float): Seconds of already-captured, not yet consumed audio prepended to a request
+        """
+        self.source = source or sr.Microphone(sample_rate=sample_rate, chunk_size=chunk_size)
+        self.noise_percentile = noise_percentile
+        self.energy_ratio = energy_ratio
+        self.min_energy_threshold = min_energy_threshold
+        self.energy_threshold = initial_energy_threshold
+        self.noise_floor = None
+        self.noise_window = noise_window
+        self.pre_roll = pre_roll
+
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self._frames_read = 0
+        # Index of the newest frame a listen() call has read; older frames are never replayed
+        self._consumed = 0
+
+    @property
+    def sample_rate(self):
+        return self.source.SAMPLE_RATE
+
+    @property
+    def sample_width(self):
+        return self.source.SAMPLE_WIDTH
+
+    @property
+    def frame_duration(self):
+        return self.source.CHUNK / self.source.SAMPLE_RATE
+
+    def start(self):
+        """Opens the audio stream and starts the background capture thread."""
+        if self._running:
+            return self
+        self.source.__enter__()
+        if self.source.stream is None:
+            raise OSError("Could not open the microphone stream")
+        frames_per_second = 1.0 / self.frame_duration
+        self._energies = deque(maxlen=max(1, int(self.noise_window * frames_per_second)))
+        self._pre_roll = deque(maxlen=max(1, int(self.pre_roll * frames_per_second)))
+        self._running = True
+        self._thread = threading.Thread(target=self._capture, name="FalconMic", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stops capturing and closes the audio stream."""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        try:
+            self.source.__exit__(None, None, None)
+        except Exception:
+            pass
+
+    def frame_energy(self, data):
+        """RMS energy of one frame on the 16-bit scale (the same scale as energy_threshold)."""
+        if self.sample_width == 4:
+            samples = np.frombuffer(data, dtype=np.int32).astype(np.float32) / 65536.0
+        else:
+            samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        if samples.size == 0:
+            return 0.0
+        return float(np.sqrt(np.mean(samples * samples)))
+
+    def _update_noise_floor(self, energy):
+        self._energies.append(energy)
+        # Recomputing every few frames is plenty; a low percentile ignores speech bursts
+        if len(self._energies) >= 8 and self._frames_read % 8 == 0:
+            self.noise_floor = float(np.percentile(self._energies, self.noise_percentile))
+            self.energy_threshold = max(self.min_energy_threshold, self.noise_floor * self.energy_ratio)
+
+    def _capture(self):
+        while self._running:
+            try:
+                data = self.source.stream.read(self.source.CHUNK)
+            except Exception as e:
+                print(f"❌ Microphone read error: {e}")
+                time.sleep(0.1)
+                continue
+            if not data:
+                break  # finite sources (e.g. audio files) are exhausted
+            energy = self.frame_energy(data)
+            with self._lock:
+                self._frames_read += 1
+                item = (data, energy, self._frames_read)
+                self._update_noise_floor(energy)
+                self._pre_roll.append(item)
+                subscribers = list(self._subscribers)
+            for subscriber in subscribers:
+                subscriber.put(item)
+        self._running = False
+        for subscriber in list(self._subscribers):
+            subscriber.put(None)
+
+    def subscribe(self, with_pre_roll=True):
+        """
+        Returns a queue receiving every captured (frame bytes, energy, frame index) tuple
+        from now on, optionally starting with the pre-roll frames no one has consumed yet
+        (see mark_consumed), so back-to-back requests never hear the same audio twice.
+        A None item means the stream ended.
+        """
+        subscriber = queue.Queue()
+        with self._lock:
+            if with_pre_roll:
+                for item in self._pre_roll:
+                    if item[2] > self._consumed:
+                        subscriber.put(item)
+            self._subscribers.add(subscriber)
+        if not self._running:
+            subscriber.put(None)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def mark_consumed(self, frame_index):
+        """Keeps frames up to `frame_index` out of later pre-rolls."""
+        with self._lock:
+            self._consumed = max(self._consumed, frame_index)
+
+    def listen(self, timeout=None, phrase_time_limit=None, pause_threshold=0.8,
+               phrase_threshold=0.3, non_speaking_duration=0.5, stream=None):
+        """
+        Captures one phrase, using the rolling noise floor to detect where it starts and ends.
+
+        Args:
+            timeout (float): Maximum seconds to wait for speech to start
+            phrase_time_limit (float): Maximum seconds of audio in the phrase
+            pause_threshold (float): Seconds of non-speaking audio that end the phrase
+            phrase_threshold (float): Minimum seconds of speaking audio for a phrase
+            non_speaking_duration (float): Seconds of audio kept before the phrase starts
+            stream: Optional STT stream (see STTBackend.open_stream) fed with the phrase
+                frames while they are captured, so recognition runs during speech
+        Returns:
+            sr.AudioData: The captured phrase
+        Raises:
+            sr.WaitTimeoutError: If no speech started within `timeout`
+        """
+        subscriber = self.subscribe()
+        frame_duration = self.frame_duration
+        lead_in = deque(maxlen=max(1, int(non_speaking_duration / frame_duration)))
+        frames = []
+        waited = speaking = silence = 0.0
+        last_index = 0
+        try:
+            while True:
+                try:
+                    item = subscriber.get(timeout=1.0)
+                except queue.Empty:
+                    if not self._running:
+                        raise sr.WaitTimeoutError("Microphone stream is not running")
+                    continue
+                if item is None:
+                    break
+                data, energy, last_index = item
+                is_speech = energy > self.energy_threshold
+
+                if not frames:
+                    if is_speech:
+                        frames.extend(lead_in)
+                        frames.append(data)
+                        if stream:
+                            for frame in frames:
+                                stream.feed(frame)
+                        speaking, silence = frame_duration, 0.0
+                        continue
+                    lead_in.append(data)
+                    waited += frame_duration
+                    if timeout and waited > timeout:
+                        raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                    continue
+
+                frames.append(data)
+                if stream:
+                    stream.feed(data)
+                if is_speech:
+                    speaking += frame_duration
+                    silence = 0.0
+                else:
+                    silence += frame_duration
+                if phrase_time_limit and len(frames) * frame_duration >= phrase_time_limit:
+                    break
+                if silence >= pause_threshold:
+                    if speaking >= phrase_threshold:
+                        break
+                    # Too short to be a phrase (a click or a cough): keep waiting
+                    waited += len(frames) * frame_duration
+                    frames = []
+                    lead_in.clear()
+                    if stream:
+                        stream.reset()
+        finally:
+            self.unsubscribe(subscriber)
+            self.mark_consumed(last_index)
+
+        if not frames:
+            raise sr.WaitTimeoutError("audio stream ended before a phrase started")
+        return sr.AudioData(b"".join(frames), self.sample_rate, self.sample_width)
+
+    def stats(self):
+        """Current noise floor and speech threshold."""
+        return {
+            "running": self._running,
+            "frames_read": self._frames_read,
+            "noise_floor": round(self.noise_floor, 1) if self.noise_floor is not None else None,
+            "energy_threshold": round(self.energy_threshold, 1),
+        }
+
+
+class STTBackend(ABC):
+    """
+    Speech-to-text engine interface.
+    transcribe() handles a complete phrase; open_stream() returns an object with
+    feed(frame_bytes), reset() and finish() -> text, fed while the user is speaking.
+    Engines raise sr.UnknownValueError when nothing was understood and
+    sr.RequestError when the engine itself failed, like speech_recognition does.
+    """
+    name = "base"
+    streaming = False
+
+    @abstractmethod
+    def transcribe(self, audio):
+        """
+        Transcribes one complete phrase.
+
+        Args:
+            audio (sr.AudioData): Captured phrase
+        Returns:
+            str: Recognized text
+        """
+
+    def open_stream(self, sample_rate, sample_width=2, on_partial=None):
+        """Default stream: buffers the frames and transcribes once the phrase has ended."""
+        return _BufferedStream(self, sample_rate, sample_width)
+
+class _BufferedStream:
+    def __init__(self, backend, sample_rate, sample_width):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.frames = []
+
+    def feed(self, data):
+        self.frames.append(data)
+
+    def reset(self):
+        self.frames = []
+
+    def audio(self):
+        return sr.AudioData(b"".join(self.frames), self.sample_rate, self.sample_width)
+
+    def finish(self):
+        return self.backend.transcribe(self.audio())
+
+class GoogleBackend(STTBackend):
+    """Google Web Speech API via speech_recognition (network round trip per phrase)."""
+    name = "google"
+
+    def __init__(self, recognizer=None, language='en-US'):
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+
+    def transcribe(self, audio):
+        return self.recognizer.recognize_google(audio, language=self.language, show_all=False)
+
+class VoskBackend(STTBackend):
+    """
+    Offline Kaldi recognizer. Frames are decoded as they arrive, so partial results are
+    available while the user is speaking and the final text is ready right after the pause.
+    """
+    name = "vosk"
+    streaming = True
+
+    def __init__(self, model_path=None, sample_rate=16000):
+        if vosk is None:
+            raise ImportError("vosk is not installed")
+        model_path = model_path or os.getenv("VOSK_MODEL_PATH", "Database/vosk-model")
+        if not os.path.isdir(model_path):
+            raise FileNotFoundError(f"Vosk model not found at '{model_path}' (set VOSK_MODEL_PATH)")
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(model_path)
+        self.sample_rate = sample_rate
+
+    def open_stream(self, sample_rate, sample_width=2, on_partial=None):
+        return _VoskStream(self.model, sample_rate, on_partial)
+
+    def transcribe(self, audio):
+        stream = self.open_stream(self.sample_rate)
+        data = audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+        for start in range(0, len(data), 8000):
+            stream.feed(data[start:start + 8000])
+        return stream.finish()
+
+class _VoskStream:
+    def __init__(self, model, sample_rate, on_partial):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.on_partial = on_partial
+        self.reset()
+
+    def reset(self):
+        self.recognizer = vosk.KaldiRecognizer(self.model, self.sample_rate)
+        self.segments = []
+        self.last_partial = ""
+
+    def feed(self, data):
+        if self.recognizer.AcceptWaveform(data):
+            text = json.loads(self.recognizer.Result()).get("text", "")
+            if text:
+                self.segments.append(text)
+        elif self.on_partial:
+            partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+            if partial and partial != self.last_partial:
+                self.last_partial = partial
+                self.on_partial(" ".join(self.segments + [partial]))
+
+    def finish(self):
+        text = json.loads(self.recognizer.FinalResult()).get("text", "")
+        text = " ".join(self.segments + ([text] if text else []))
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+class WhisperBackend(STTBackend):
+    """
+    Offline Whisper (CTranslate2 via faster-whisper, int8 on CPU). Whisper is not an
+    incremental decoder, so partial results come from re-transcribing the audio captured
+    so far every `partial_interval` seconds on a background thread.
+    """
+    name = "whisper"
+    streaming = True
+
+    def __init__(self, model_size=None, partial_interval=1.0, sample_rate=16000):
+        if WhisperModel is None:
+            raise ImportError("faster-whisper is not installed")
+        self.model = WhisperModel(model_size or os.getenv("WHISPER_MODEL", "base.en"), device="cpu", compute_type="int8")
+        self.partial_interval = partial_interval
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()  # one decode at a time per model
+
+    def transcribe_samples(self, samples):
+        with self._lock:
+            segments, _ = self.model.transcribe(samples, language="en", beam_size=1)
+            return " ".join(segment.text.strip() for segment in segments).strip()
+
+    def transcribe(self, audio):
+        data = audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+        text = self.transcribe_samples(np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0)
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+    def open_stream(self, sample_rate, sample_width=2, on_partial=None):
+        if not on_partial:
+            return super().open_stream(sample_rate, sample_width)
+        return _WhisperStream(self, sample_rate, sample_width, on_partial)
+
+class _WhisperStream(_BufferedStream):
+    def __init__(self, backend, sample_rate, sample_width, on_partial):
+        super().__init__(backend, sample_rate, sample_width)
+        self.on_partial = on_partial
+        self.since_partial = 0.0
+        self.partial_thread = None
+
+    def feed(self, data):
+        super().feed(data)
+        self.since_partial += len(data) / (self.sample_rate * self.sample_width)
+        busy = self.partial_thread is not None and self.partial_thread.is_alive()
+        if self.since_partial >= self.backend.partial_interval and not busy:
+            self.since_partial = 0.0
+            audio = self.audio()
+            self.partial_thread = threading.Thread(target=self._partial, args=(audio,), daemon=True)
+            self.partial_thread.start()
+
+    def _partial(self, audio):
+        try:
+            self.on_partial(self.backend.transcribe(audio))
+        except Exception:
+            pass  # partials are best effort
+
+    def finish(self):
+        if self.partial_thread is not None:
+            self.partial_thread.join()
+        return self.backend.transcribe(self.audio())
+
+STT_BACKENDS = {
+    "google": GoogleBackend,
+    "vosk": VoskBackend,
+    "whisper": WhisperBackend,
+}
+
+def create_stt_backend(name=None):
+    """
+    Creates the configured speech-to-text backend (FALCON_STT_BACKEND: google, vosk or whisper).
+    A local engine that is not installed or has no model falls back to Google.
+    """
+    name = (name or os.getenv("FALCON_STT_BACKEND", "google")).lower()
+    try:
+        return STT_BACKENDS[name]()
+    except KeyError:
+        print(f"❌ Unknown speech backend '{name}', using Google")
+    except Exception as e:
+        print(f"Warning: Speech backend '{name}' unavailable ({e}); using Google")
+    return GoogleBackend()
+
+_stt_backend = None
+
+def get_stt_backend():
+    """Returns the shared speech-to-text backend, creating it on first use."""
+    global _stt_backend
+    with _listener_lock:
+        if _stt_backend is None:
+            _stt_backend = create_stt_backend()
+        return _stt_backend
+
+class VoiceActivityDetector:
+    """
+    Frame-level voice activity detection in NumPy.
+    A 30 ms frame counts as speech when it is above the energy threshold, most of its
+    energy lies in the speech band and its zero-crossing rate is not noise-like.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, band=(250, 4000), min_band_ratio=0.6, max_zcr=0.35):
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.min_band_ratio = min_band_ratio
+        self.max_zcr = max_zcr
+        freqs = np.fft.rfftfreq(self.frame_length, 1.0 / sample_rate)
+        self._band = (freqs >= band[0]) & (freqs <= band[1])
+        self._window = np.hanning(self.frame_length).astype(np.float32)
+
+    def _frames(self, samples):
+        count = len(samples) // self.frame_length
+        return samples[:count * self.frame_length].reshape(count, self.frame_length)
+
+    def speech_frames(self, samples, energy_threshold):
+        """
+        Boolean mask of speech frames.
+
+        Args:
+            samples (np.ndarray): Mono 16-bit samples as float32
+            energy_threshold (float): RMS energy a speech frame must exceed
+        Returns:
+            np.ndarray: One bool per frame
+        """
+        frames = self._frames(samples)
+        if frames.size == 0:
+            return np.zeros(0, dtype=bool)
+        energy = np.sqrt(np.mean(frames * frames, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        spectrum = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2
+        band_ratio = spectrum[:, self._band].sum(axis=1) / np.maximum(spectrum.sum(axis=1), 1e-9)
+        return (energy > energy_threshold) & (band_ratio >= self.min_band_ratio) & (zcr <= self.max_zcr)
+
+    def voiced_seconds(self, samples, energy_threshold):
+        """Seconds of speech in the samples."""
+        return float(self.speech_frames(samples, energy_threshold).sum()) * self.frame_length / self.sample_rate
+
+class WakeWordSpotter:
+    """
+    Lightweight template-matching keyword spotter.
+    The first few words of a chunk's speech are compared with recordings of the wake word
+    using log-mel features and open-ended DTW, so "hey Falcon, ..." matches as well as
+    "Falcon, ...". Templates are loaded from `template_dir` and enrolled automatically from
+    chunks the recognizer confirmed contained the wake word; a template that keeps failing
+    is replaced by the next confirmed recording. Until the first template exists every
+    voiced chunk is treated as a possible match.
+    """
+
+    def __init__(self, sample_rate=16000, template_dir="Database/WakeWord", max_templates=8,
+                 threshold=0.2, n_mels=24, max_word_seconds=1.0, max_words=3, word_seconds=0.35,
+                 max_failures=3):
+        self.sample_rate = sample_rate
+        self.template_dir = template_dir
+        self.max_templates = max_templates
+        self.threshold = threshold
+        self.max_word_seconds = max_word_seconds
+        self.max_words = max_words
+        self.word_seconds = word_seconds
+        self.max_failures = max_failures
+        self.frame_length = int(0.025 * sample_rate)
+        self.hop_length = int(0.010 * sample_rate)
+        self.n_fft = 512
+        self._window = np.hamming(self.frame_length).astype(np.float32)
+        self._mel = self._mel_filterbank(n_mels)
+        self.templates = []
+        self.template_paths = []
+        # Consecutive failures per template: wake words it missed, or chunks it let through without one
+        self.failures = []
+        self._load_templates()
+
+    def _mel_filterbank(self, n_mels):
+        to_mel = lambda hz: 2595.0 * np.log10(1.0 + hz / 700.0)
+        to_hz = lambda mel: 700.0 * (10 ** (mel / 2595.0) - 1.0)
+        edges = to_hz(np.linspace(to_mel(100), to_mel(self.sample_rate / 2), n_mels + 2))
+        bins = np.floor((self.n_fft + 1) * edges / self.sample_rate).astype(int)
+        bank = np.zeros((n_mels, self.n_fft // 2 + 1), dtype=np.float32)
+        for i in range(n_mels):
+            left, center, right = bins[i], bins[i + 1], bins[i + 2]
+            if center > left:
+                bank[i, left:center] = (np.arange(left, center) - left) / (center - left)
+            if right > center:
+                bank[i, center:right] = (right - np.arange(center, right)) / (right - center)
+        return bank
+
+    def features(self, samples):
+        """Mean-normalised, unit-length log-mel frames (one row per 10 ms)."""
+        if len(samples) < self.frame_length:
+            return np.zeros((0, self._mel.shape[0]), dtype=np.float32)
+        count = 1 + (len(samples) - self.frame_length) // self.hop_length
+        index = np.arange(self.frame_length)[None, :] + self.hop_length * np.arange(count)[:, None]
+        spectrum = np.abs(np.fft.rfft(samples[index] * self._window, n=self.n_fft, axis=1)) ** 2
+        log_mel = np.log(spectrum @ self._mel.T + 1e-6)
+        log_mel -= log_mel.mean(axis=0, keepdims=True)
+        return log_mel / np.maximum(np.linalg.norm(log_mel, axis=1, keepdims=True), 1e-9)
+
+    def word_starts(self, speech_mask, vad_frame_length, min_gap_frames=3):
+        """
+        Sample offsets where the first `max_words` words plausibly begin.
+
+        Speech after a pause of at least `min_gap_frames` starts a word. Fluent speech has
+        few pauses, so missing starts are filled in at `word_seconds` steps after the first.
+        """
+        voiced = np.flatnonzero(speech_mask)
+        if not voiced.size:
+            return [0]
+        starts = [int(voiced[0])] + [int(frame) for frame, gap in zip(voiced[1:], np.diff(voiced)) if gap > min_gap_frames]
+        starts = [frame * vad_frame_length for frame in starts[:self.max_words]]
+        step = int(self.word_seconds * self.sample_rate)
+        while len(starts) < self.max_words:
+            starts.append(starts[0] + step * len(starts))
+        return sorted(set(starts))
+
+    def _word_at(self, samples, start):
+        """Samples from `start`, at most `max_word_seconds` long."""
+        return samples[start:start + int(self.max_word_seconds * self.sample_rate)]
+
+    @staticmethod
+    def _dtw_distances(templates, query, slack=1.5):
+        """
+        Open-ended DTW of every template against the best-matching prefix of the query,
+        looking at most `slack` times the template length into it.
+
+        All templates are aligned at once, one template row per step. Within a row,
+        acc[j] = min(t[j], cost[j] + acc[j - 1]) unrolls to S[j] + min over k <= j of
+        (t[k] - S[k]), where S is the row's cumulative cost, so a cumulative minimum
+        replaces the inner loop. Cells past a template's own size never feed the cells
+        read for it, so the templates can share one zero-padded array.
+        """
+        lengths = np.array([len(template) for template in templates])
+        widths = np.minimum(len(query), (lengths * slack).astype(int) + 1)
+        padded = np.zeros((len(templates), lengths.max(), query.shape[1]), dtype=np.float64)
+        for k, template in enumerate(templates):
+            padded[k, :len(template)] = template
+        cost = 1.0 - padded @ query.T  # (templates, template rows, query frames)
+        previous = np.full((len(templates), cost.shape[2] + 1), np.inf)
+        previous[:, 0] = 0.0
+        last_rows = np.empty_like(previous)
+        for i in range(cost.shape[1]):
+            row_cost = cost[:, i, :]
+            through = row_cost + np.minimum(previous[:, 1:], previous[:, :-1])
+            cumulative = np.cumsum(row_cost, axis=1)
+            row = np.full_like(previous, np.inf)
+            row[:, 1:] = cumulative + np.minimum.accumulate(through - cumulative, axis=1)
+            finished = lengths == i + 1
+            last_rows[finished] = row[finished]
+            previous = row
+        distances = np.empty(len(templates))
+        for k in range(len(templates)):
+            width = widths[k]
+            distances[k] = np.min(last_rows[k, 1:width + 1] / (lengths[k] + np.arange(1, width + 1)))
+        return distances
+
+    def match(self, samples, speech_mask, vad_frame_length):
+        """
+        Best template match over the starts of the first `max_words` words.
+
+        Args:
+            samples (np.ndarray): Chunk samples as float32
+            speech_mask (np.ndarray): VoiceActivityDetector.speech_frames for the chunk
+            vad_frame_length (int): Samples per VAD frame
+        Returns:
+            tuple: (DTW distance, template index) of the best match; (None, None) without templates
+        """
+        if not self.templates:
+            return None, None
+        best = (float("inf"), None)
+        for start in self.word_starts(speech_mask, vad_frame_length):
+            query = self.features(self._word_at(samples, start))[::2]
+            if len(query) == 0:
+                continue
+            # Look a little past each template's length so slower speech still aligns
+            distances = self._dtw_distances(self.templates, query)
+            index = int(np.argmin(distances))
+            if distances[index] < best[0]:
+                best = (float(distances[index]), index)
+        return best
+
+    def score(self, samples, speech_mask, vad_frame_length):
+        """Returns the best (lowest) DTW distance to any template, or None without templates."""
+        return self.match(samples, speech_mask, vad_frame_length)[0]
+
+    def is_likely(self, samples, speech_mask, vad_frame_length):
+        distance = self.score(samples, speech_mask, vad_frame_length)
+        return distance is None or distance <= self.threshold
+
+    def record_failure(self, index):
+        """Counts a failure against a template; it becomes replaceable after `max_failures` in a row."""
+        if index is not None and index < len(self.failures):
+            self.failures[index] += 1
+
+    def record_success(self, index):
+        if index is not None and index < len(self.failures):
+            self.failures[index] = 0
+
+    def enroll(self, samples, speech_mask, vad_frame_length, word_index=0):
+        """
+        Adds the `word_index`-th word of a confirmed wake-word chunk as a template (and saves it).
+        When all slots are taken, the template with the most consecutive failures is replaced,
+        provided it has reached `max_failures`.
+        """
+        replace = None
+        if len(self.templates) >= self.max_templates:
+            worst = max(range(len(self.failures)), key=self.failures.__getitem__)
+            if self.failures[worst] < self.max_failures:
+                return False
+            replace = worst
+        starts = self.word_starts(speech_mask, vad_frame_length)
+        if word_index >= len(starts):
+            return False
+        word = self._word_at(samples, starts[word_index])
+        template = self.features(word)[::2]  # 20 ms steps keep DTW cheap
+        if len(template) < 5:
+            return False
+        path = None
+        if self.template_dir:
+            try:
+                os.makedirs(self.template_dir, exist_ok=True)
+                path = os.path.join(self.template_dir, f"wake_{int(time.time() * 1000)}.wav")
+                with wave.open(path, "wb") as f:
+                    f.setnchannels(1)
+                    f.setsampwidth(2)
+                    f.setframerate(self.sample_rate)
+                    f.writeframes(np.clip(word, -32768, 32767).astype(np.int16).tobytes())
+            except OSError as e:
+                print(f"❌ Could not save wake word template: {e}")
+                path = None
+        if replace is None:
+            self.templates.append(template)
+            self.template_paths.append(path)
+            self.failures.append(0)
+        else:
+            old_path = self.template_paths[replace]
+            self.templates[replace], self.template_paths[replace], self.failures[replace] = template, path, 0
+            if old_path:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+        return True
+
+    def _load_templates(self):
+        if not self.template_dir:
+            return
+        for path in sorted(glob.glob(os.path.join(self.template_dir, "*.wav")))[:self.max_templates]:
+            try:
+                with wave.open(path, "rb") as f:
+                    if f.getframerate() != self.sample_rate or f.getsampwidth() != 2 or f.getnchannels() != 1:
+                        continue
+                    samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16).astype(np.float32)
+            except (OSError, wave.Error):
+                continue
+            template = self.features(samples)[::2]
+            if len(template) >= 5:
+                self.templates.append(template)
+                self.template_paths.append(path)
+                self.failures.append(0)
+
+class UploadGate:
+    """
+    Decides locally whether a continuous-listening chunk is worth a recognizer round trip:
+    it must contain enough speech, and one of its first words must plausibly be the wake word.
+    Every `probe_every`-th chunk the spotter rejects is uploaded anyway, so wake words the
+    templates miss are noticed and the failing templates replaced.
+    """
+
+    def __init__(self, session, min_speech_seconds=0.25, spotter=None, probe_every=20):
+        self.session = session
+        self.min_speech_seconds = min_speech_seconds
+        self.vad = VoiceActivityDetector(sample_rate=session.sample_rate)
+        self.spotter = spotter or WakeWordSpotter(sample_rate=session.sample_rate)
+        self.probe_every = probe_every
+        self._rejected = 0
+        # What the gate decided for the last uploaded chunk: ("probe" | "match", template index)
+        self._last = None
+
+    def _samples(self, audio):
+        return np.frombuffer(audio.get_raw_data(convert_rate=self.session.sample_rate, convert_width=2), dtype=np.int16).astype(np.float32)
+
+    def should_upload(self, audio):
+        """
+        Returns True if the chunk should be sent to the recognizer; counts skips in UPLOAD_STATS.
+        """
+        _count_upload("chunks")
+        self._last = None
+        samples = self._samples(audio)
+        speech = self.vad.speech_frames(samples, self.session.energy_threshold)
+        if speech.sum() * self.vad.frame_length / self.vad.sample_rate < self.min_speech_seconds:
+            _count_upload("skipped_no_speech")
+            return False
+        distance, index = self.spotter.match(samples, speech, self.vad.frame_length)
+        if distance is not None and distance > self.spotter.threshold:
+            self._rejected += 1
+            if self.probe_every and self._rejected % self.probe_every == 0:
+                _count_upload("probes")
+                self._last = ("probe", None)
+                return True
+            _count_upload("skipped_no_wake_word")
+            return False
+        _count_upload("uploaded")
+        self._last = ("match", index)
+        return True
+
+    def wake_word_position(self, text, wake_word):
+        """Index of the wake word among the first `max_words` words of a transcript, or None."""
+        words = [word.strip(".,!?;:'\"") for word in text.lower().split()[:self.spotter.max_words]]
+        return words.index(wake_word.lower()) if wake_word.lower() in words else None
+
+    def report(self, audio, text, wake_word):
+        """
+        Feeds back what the recognizer heard in the last uploaded chunk. Confirmed wake words
+        are enrolled as templates; templates that missed one, or let a chunk without it
+        through, are charged a failure.
+        """
+        kind, index = self._last or (None, None)
+        self._last = None
+        position = self.wake_word_position(text, wake_word)
+        if position is None:
+            if kind == "match":
+                self.spotter.record_failure(index)
+            return
+        if kind == "probe":
+            _count_upload("probe_hits")
+            # Every template rejected this wake word
+            for i in range(len(self.spotter.templates)):
+                self.spotter.record_failure(i)
+        elif kind == "match":
+            self.spotter.record_success(index)
+        samples = self._samples(audio)
+        speech = self.vad.speech_frames(samples, self.session.energy_threshold)
+        if self.spotter.enroll(samples, speech, self.vad.frame_length, position):
+            print(f"🎯 Wake word template learned ({len(self.spotter.templates)}/{self.spotter.max_templates})")
+
+def get_upload_stats():
+    """Chunks seen by continuous listening, uploads made and uploads avoided."""
+    with _upload_stats_lock:
+        stats = dict(UPLOAD_STATS)
+    stats["uploads_avoided"] = stats.get("skipped_no_speech", 0) + stats.get("skipped_no_wake_word", 0)
+    return stats
+
+_listener_session = None
+_listener_lock = threading.Lock()
+
+def get_listener_session():
+    """Returns the shared ListenerSession, opening the microphone on first use."""
+    global _listener_session
+    with _listener_lock:
+        if _listener_session is None:
+            _listener_session = ListenerSession().start()
+        return _listener_session
+
+def recognize_speech(callback=None, timeout=10, phrase_time_limit=5, on_partial=None):
     """
     Enhanced speech recognition with better error handling and configuration.
 
@@ -9,42 +838,30 @@ def recognize_speech(callback=None, timeout=10, phrase_time_limit=5):
         callback: Function to call with recognized text
         timeout: Maximum time to wait for speech to start
         phrase_time_limit: Maximum time to listen for a phrase
+        on_partial: Optional function called with interim text while the user is
+            still speaking (streaming backends only)
     """
-    recognizer = sr.Recognizer()
-
-    # Enhanced recognizer settings for better accuracy
-    recognizer.energy_threshold = 300  # Minimum audio energy to consider for recording
-    recognizer.dynamic_energy_threshold = True
-    recognizer.dynamic_energy_adjustment_damping = 0.15
-    recognizer.dynamic_energy_ratio = 1.5
-    recognizer.pause_threshold = 0.8  # Seconds of non-speaking audio before phrase is complete
-    recognizer.operation_timeout = None  # No timeout for operations
-    recognizer.phrase_threshold = 0.3  # Minimum seconds of speaking audio before considering phrase
-    recognizer.non_speaking_duration = 0.5  # Seconds of non-speaking audio to keep on both sides
-
-    # Get the default microphone
-    mic = sr.Microphone()
+    try:
+        session = get_listener_session()
+    except Exception as e:
+        print(f"❌ Could not open microphone: {e}")
+        return None
+    backend = get_stt_backend()
 
-    with mic as source:
-        print("🎤 Falcon is listening...")
-        # Adjust for ambient noise with longer duration for better calibration
-        recognizer.adjust_for_ambient_noise(source, duration=1)
-        print("🔧 Audio calibrated. Speak now...")
+    # The session is already calibrated, so capture starts right away
+    print("🎤 Falcon is listening... Speak now...")
 
-        try:
-            # Listen for audio with timeout and phrase limit
-            audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
-        except sr.WaitTimeoutError:
-            print("⏰ Listening timeout - no speech detected")
-            return None
+    # Streaming backends recognize while the phrase is being captured
+    stream = backend.open_stream(session.sample_rate, session.sample_width, on_partial)
+    try:
+        # Listen for audio with timeout and phrase limit
+        session.listen(timeout=timeout, phrase_time_limit=phrase_time_limit, stream=stream)
+    except sr.WaitTimeoutError:
+        print("⏰ Listening timeout - no speech detected")
+        return None
 
     try:
-        # Use Google's speech recognition with enhanced language support
-        text = recognizer.recognize_google(
-            audio,
-            language='en-US',  # Changed to US English for better recognition
-            show_all=False  # Return only the most likely result
-        )
+        text = stream.finish()
 
         print(f"🗣️  User: {text}")
         if callback:
@@ -55,7 +872,7 @@ def recognize_speech(callback=None, timeout=10, phrase_time_limit=5):
         print("🤖 Could not understand audio - please speak clearly")
         return None
     except sr.RequestError as e:
-        print(f"🔌 Could not request results from Google Speech Recognition service; {e}")
+        print(f"🔌 Could not request results from the {backend.name} speech recognition service; {e}")
         return None
     except Exception as e:
         print(f"❌ Unexpected error in speech recognition: {e}")
@@ -69,21 +886,26 @@ def continuous_listen(callback=None, wake_word="falcon"):
         callback: Function to call with recognized text
         wake_word: Word to activate listening mode
     """
-    recognizer = sr.Recognizer()
-    mic = sr.Microphone()
+    try:
+        session = get_listener_session()
+    except Exception as e:
+        print(f"❌ Could not open microphone: {e}")
+        return None
 
     print(f"🎯 Continuous listening mode activated. Say '{wake_word}' to start...")
-
-    with mic as source:
-        recognizer.adjust_for_ambient_noise(source)
+    gate = UploadGate(session)
 
     while True:
         try:
-            with mic as source:
-                # Listen for wake word with shorter timeout
-                audio = recognizer.listen(source, timeout=1, phrase_time_limit=3)
+            # Listen for wake word with shorter timeout; the stream stays open between chunks
+            audio = session.listen(timeout=1, phrase_time_limit=3)
 
-            text = recognizer.recognize_google(audio, language='en-US')
+            # Silence, noise and speech that does not start like the wake word are never transcribed
+            if not gate.should_upload(audio):
+                continue
+
+            text = get_stt_backend().transcribe(audio)
+            gate.report(audio, text, wake_word)
 
             if wake_word.lower() in text.lower():
                 print(f"🎯 Wake word '{wake_word}' detected!")
@@ -107,8 +929,8 @@ def continuous_listen(callback=None, wake_word="falcon"):
             print(f"🔌 Speech recognition error: {e}")
             time.sleep(1)
         except KeyboardInterrupt:
-            print("🛑 Continuous listening stopped")
+            print(f"🛑 Continuous listening stopped. Upload stats: {get_upload_stats()}")
             break
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
-            time.sleep(1)
\ No newline at end of file
+            time.sleep(1)
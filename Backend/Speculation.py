@@ -0,0 +1,271 @@
+import os
+import re
+import sys
+import queue
+import asyncio
+import threading
+from collections import Counter
+from typing import Optional
+
+# Add parent directory to Python path for backend module imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from Backend.Brain import CompletionCancelled
+
+
+def normalize_transcript(text: str) -> str:
+    """Lowercase, punctuation-free, single-spaced form used to compare interim and final transcripts."""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s']", " ", (text or "").lower())).strip()
+
+
+def estimate_tokens(messages: list) -> int:
+    """Rough prompt size (about four characters per token) for accounting only."""
+    return sum(len(str(message.get("content") or "")) for message in messages) // 4
+
+
+class SpeculativeTurn:
+    """
+    Memory retrieval, context assembly and the first completion for an interim
+    transcript, run ahead of the final one on the assistant's event loop, like the
+    turns themselves. Nothing is written to the database and no tool is executed; the
+    turn either gets committed into process_message or cancelled.
+    """
+    _END = object()
+
+    def __init__(self, assistant, text: str, key: str):
+        self.assistant = assistant
+        self.text = text
+        self.key = key
+        self.future = None
+        self.cancel_event = threading.Event()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.request_sent = False
+        # Deltas are handed to the committing thread, so on_token keeps running where the caller runs it
+        self._tokens = queue.Queue()
+        # (loop, asyncio.Event) of an async commit waiting for deltas
+        self._waiter = None
+
+    def start(self):
+        # A concurrent Future, so both the page's threads and the loop can wait on it
+        self.future = asyncio.run_coroutine_threadsafe(self._run(), self.assistant._get_loop())
+
+    def _on_token(self, delta: str):
+        self.completion_tokens += 1
+        self._put(delta)
+
+    def _put(self, item):
+        self._tokens.put(item)
+        waiter = self._waiter
+        if waiter is not None:
+            loop, wakeup = waiter
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # The committing loop has already closed
+
+    async def _run(self):
+        try:
+            api_messages = await self.assistant._run_db(self.assistant._build_context, self.text)
+            if self.cancel_event.is_set():
+                raise CompletionCancelled()
+            self.prompt_tokens = estimate_tokens(api_messages)
+            self.request_sent = True
+            result = await self.assistant._create_completion_async(
+                api_messages, self._on_token, cancel_event=self.cancel_event,
+                tools=self.assistant.tools, tool_choice="auto",
+            )
+            return api_messages, result
+        finally:
+            self._put(self._END)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def failed(self) -> bool:
+        """True once the turn finished with an error other than cancellation."""
+        return self.future.done() and not self.cancelled and self.future.exception() is not None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def commit(self, on_token=None, cancel_event=None):
+        """
+        Adopts the speculative result for the final transcript.
+
+        Args:
+            on_token: Optional callable; receives the deltas generated so far, then the rest live
+            cancel_event: Optional threading.Event of the committing query; cancels this turn too
+
+        Returns:
+            tuple: (api_messages, (message, content, tool calls or None)) as in process_message
+        """
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                self.cancel()
+                raise CompletionCancelled()
+            try:
+                delta = self._tokens.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if delta is self._END:
+                break
+            if on_token:
+                on_token(delta)
+        return self.future.result()
+
+    async def commit_async(self, on_token=None, cancel_event=None):
+        """
+        Async counterpart of commit: waits for deltas on the event loop instead of a thread.
+
+        Args:
+            on_token: Optional callable; receives the deltas generated so far, then the rest live
+            cancel_event: Optional threading.Event of the committing query; cancels this turn too
+
+        Returns:
+            tuple: (api_messages, (message, content, tool calls or None)) as in process_message
+        """
+        wakeup = asyncio.Event()
+        self._waiter = (asyncio.get_running_loop(), wakeup)
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    self.cancel()
+                    raise CompletionCancelled()
+                try:
+                    delta = self._tokens.get_nowait()
+                except queue.Empty:
+                    wakeup.clear()
+                    # Re-checked after clearing, so a delta put in between is not slept through
+                    if self._tokens.empty():
+                        try:
+                            # Bounded so a threading.Event cancel is still noticed
+                            await asyncio.wait_for(wakeup.wait(), 0.05)
+                        except asyncio.TimeoutError:
+                            pass
+                    continue
+                if delta is self._END:
+                    break
+                if on_token:
+                    on_token(delta)
+        finally:
+            self._waiter = None
+        return await asyncio.wrap_future(self.future)
+
+
+class SpeculativeDispatcher:
+    """
+    Starts process_message's model round-trip from interim transcripts.
+    The page only forwards an interim transcript once it has been stable for its
+    debounce window. If the next one differs, the running turn is cancelled and a new
+    one started; the final transcript either claims a matching turn or cancels it.
+    """
+
+    def __init__(self, assistant, min_words: int = 3):
+        self.assistant = assistant
+        self.min_words = min_words
+        self._lock = threading.Lock()
+        self._current: Optional[SpeculativeTurn] = None
+        self._counts = Counter()
+        self._wasted_prompt_tokens = 0
+        self._wasted_completion_tokens = 0
+
+    def _record_waste(self, turn: SpeculativeTurn):
+        with self._lock:
+            if turn.request_sent:
+                self._wasted_prompt_tokens += turn.prompt_tokens
+            self._wasted_completion_tokens += turn.completion_tokens
+
+    def _discard(self, turn: SpeculativeTurn, reason: str):
+        turn.cancel()
+        with self._lock:
+            self._counts[reason] += 1
+        # Counted once the worker has stopped, so tokens still arriving are included
+        turn.future.add_done_callback(lambda _: self._record_waste(turn))
+
+    def on_interim(self, text: str) -> bool:
+        """
+        Feeds one stable interim transcript.
+
+        Args:
+            text (str): Interim transcript from the recogniser
+
+        Returns:
+            bool: True if a speculative turn is running for this text
+        """
+        key = normalize_transcript(text)
+        if len(key.split()) < self.min_words:
+            return False
+        with self._lock:
+            current = self._current
+            if current is not None and current.key == key and not current.cancelled:
+                return True
+            self._current = None
+        if current is not None:
+            self._discard(current, "diverged")
+
+        # Local commands never reach the model, so there is nothing to get ahead of
+        if self.assistant.intent_router.route(text, can_dispatch=self.assistant._tool_available, record=False):
+            return False
+
+        turn = SpeculativeTurn(self.assistant, text.strip(), key)
+        with self._lock:
+            self._current = turn
+            self._counts["started"] += 1
+        turn.start()
+        return True
+
+    def claim(self, final_text: str) -> Optional[SpeculativeTurn]:
+        """
+        Returns the running turn if it was started for `final_text`, otherwise cancels it.
+
+        Args:
+            final_text (str): Final transcript about to be processed
+
+        Returns:
+            SpeculativeTurn or None: Turn to pass to process_message(speculation=...)
+        """
+        key = normalize_transcript(final_text)
+        with self._lock:
+            turn, self._current = self._current, None
+        if turn is None:
+            with self._lock:
+                self._counts["missed"] += 1
+            return None
+        if turn.key != key or turn.cancelled:
+            self._discard(turn, "diverged")
+            return None
+        if turn.failed():
+            with self._lock:
+                self._counts["failed"] += 1
+            return None
+        with self._lock:
+            self._counts["hits"] += 1
+        return turn
+
+    def cancel(self):
+        """Drops any running turn, e.g. when the user stops talking without a final result."""
+        with self._lock:
+            turn, self._current = self._current, None
+        if turn is not None:
+            self._discard(turn, "cancelled")
+
+    def stats(self) -> dict:
+        """Hit rate over started speculations and the tokens spent on discarded ones."""
+        with self._lock:
+            started = self._counts["started"]
+            return {
+                "started": started,
+                "hits": self._counts["hits"],
+                "diverged": self._counts["diverged"],
+                "cancelled": self._counts["cancelled"],
+                "failed": self._counts["failed"],
+                "missed": self._counts["missed"],
+                "hit_rate": round(self._counts["hits"] / started, 3) if started else 0.0,
+                "wasted_prompt_tokens_est": self._wasted_prompt_tokens,
+                "wasted_completion_tokens": self._wasted_completion_tokens,
+            }
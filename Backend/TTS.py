@@ -1,46 +1,71 @@
+import io
 import pygame
-import random
 import asyncio
 import edge_tts
 import os
 import re
+import sys
+import hashlib
+import queue
+import shutil
+import subprocess
 import unicodedata
 import tempfile
 import time
 import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+try:
+    import pyttsx3
+except ImportError:
+    pyttsx3 = None
+
+# Add parent directory to Python path for backend module imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from Backend.Metrics import LatencyRegistry, LatencyStats
+
 load_dotenv()
 
-class TTSEngine:
-    """Enhanced TTS Engine with better interrupt handling"""
-    
-    def __init__(self):
-        self.is_playing = False
-        self.should_stop = False
-        self.current_audio_file = None
-        self.playback_thread = None
-        self.lock = threading.Lock()
-        
-        # Initialize pygame mixer
-        if not pygame.mixer.get_init():
-            try:
-                pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
-            except pygame.error as e:
-                print(f"Failed to initialize pygame mixer: {e}")
-                raise
-    
-    def stop_playback(self):
-        """Stop current playback immediately"""
-        with self.lock:
-            self.should_stop = True
-            if pygame.mixer.get_init() and pygame.mixer.music.get_busy():
-                pygame.mixer.music.stop()
-    
-    def is_currently_playing(self):
-        """Check if TTS is currently playing"""
-        with self.lock:
-            return self.is_playing
+# Longer answers are only partially spoken; the full text is always shown in the UI
+LONG_TEXT_LIMIT = 800
+LONG_TEXT_NOTE = "The complete response is displayed on screen."
+
+# Playback timings: "time_to_first_audio" (call to first sound) and "inter_chunk_gap"
+# (silence between consecutive chunks; 0 when the next chunk was queued in time)
+TTS_METRICS = LatencyRegistry()
+
+# Barge-in: time from a stop request to the speech channel going silent
+BARGE_IN_LATENCY = LatencyStats(buckets_ms=(1, 2, 5, 10, 25, 50, 100, 250, 500))
+
+# Speaking rate and pitch used for every utterance; both are part of the audio cache key
+TTS_RATE = '+10%'  # Slightly faster for better user experience
+TTS_PITCH = '+0Hz'
+
+# Mixer format matching edge-tts output (24 kHz mono mp3), so decoded chunks need no
+# resampling or channel up-mixing. 512 frames is ~21 ms of output latency at 24 kHz.
+MIXER_FREQUENCY = 24000
+MIXER_CHANNELS = 1
+MIXER_BUFFER = 512
+
+# Fixed phrases Falcon speaks often (emojis are dropped by clean_text, so these are the spoken forms)
+COMMON_PHRASES = (
+    LONG_TEXT_NOTE,
+    "Note saved to long-term memory.",
+    "System task executed.",
+    "Image generated and opened.",
+    "Content generated and saved to file.",
+)
+
+def init_mixer(buffer=MIXER_BUFFER):
+    """Initializes the pygame mixer in the speech format, unless it is already running."""
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(frequency=MIXER_FREQUENCY, size=-16, channels=MIXER_CHANNELS, buffer=buffer)
 
 def clean_text(text):
     """
@@ -77,65 +102,733 @@ def clean_text(text):
     
     return cleaned_text.strip()
 
-async def text_to_audio_file(text, voice="en-US-AriaNeural"):
+async def text_to_audio_bytes(text, voice="en-US-AriaNeural", rate=TTS_RATE, pitch=TTS_PITCH):
     """
-    Converts text to speech audio file using edge-tts.
-    Uses unique filenames to avoid file conflicts.
+    Converts text to speech audio using edge-tts, collecting the streamed
+    mp3 data in memory instead of writing a file.
     
     Args:
         text (str): Text to convert to speech
         voice (str): Voice to use for TTS
+        rate (str): Speaking rate adjustment, e.g. '+10%'
+        pitch (str): Pitch adjustment, e.g. '+0Hz'
     Returns:
-        str: Path to the generated audio file
+        bytes: The synthesized mp3 audio
     """
-    # Use timestamp and random number to create unique filename
-    timestamp = int(time.time() * 1000)
-    random_num = random.randint(1000, 9999)
-    file_path = f"Database/TTS_{timestamp}_{random_num}.mp3"
-    
-    # Ensure the directory exists
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
     try:
         # Convert text to speech with better settings
         communicate = edge_tts.Communicate(
             text, 
             voice, 
-            pitch='+0Hz', 
-            rate='+10%',  # Slightly faster for better user experience
+            pitch=pitch, 
+            rate=rate,
             volume='+0%'
         )
-        await communicate.save(file_path)
-        return file_path
+        buffer = io.BytesIO()
+        async for message in communicate.stream():
+            if message["type"] == "audio":
+                buffer.write(message["data"])
+        return buffer.getvalue()
     except Exception as e:
         print(f"Error generating TTS audio: {e}")
         raise
 
-def cleanup_old_tts_files():
-    """Clean up old TTS files to prevent disk space issues."""
-    try:
-        database_dir = "Database"
-        if not os.path.exists(database_dir):
+class TTSCache:
+    """
+    Content-addressed cache of synthesized audio, keyed on (cleaned text, voice, rate, pitch).
+    Entries are kept in memory up to `max_bytes` and evicted least-recently-used first;
+    with a `spill_dir`, evicted entries move to disk (bounded by `spill_max_bytes`)
+    instead of being dropped. Pinned entries (the pre-warmed phrases) are never evicted.
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, spill_dir=None, spill_max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self._entries = OrderedDict()  # key -> audio bytes, least recently used first
+        self._pinned = set()
+        self._bytes = 0
+        self._spilled = OrderedDict()  # key -> size on disk
+        self._spilled_bytes = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        if spill_dir:
+            self._load_spill_index()
+
+    @staticmethod
+    def make_key(text, voice, rate=TTS_RATE, pitch=TTS_PITCH):
+        return hashlib.sha256(f"{voice}\n{rate}\n{pitch}\n{text}".encode("utf-8")).hexdigest()
+
+    def _load_spill_index(self):
+        """Indexes audio spilled by earlier runs, oldest first."""
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            files = [entry for entry in os.scandir(self.spill_dir) if entry.name.endswith(".mp3")]
+        except OSError as e:
+            print(f"TTS cache spill directory unavailable: {e}")
+            self.spill_dir = None
             return
-            
-        current_time = time.time()
-        for filename in os.listdir(database_dir):
-            if filename.startswith("TTS_") and filename.endswith(".mp3"):
-                file_path = os.path.join(database_dir, filename)
+        for entry in sorted(files, key=lambda entry: entry.stat().st_mtime):
+            size = entry.stat().st_size
+            self._spilled[entry.name[:-4]] = size
+            self._spilled_bytes += size
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.mp3")
+
+    def get(self, text, voice, rate=TTS_RATE, pitch=TTS_PITCH):
+        """
+        Returns cached audio for the given text and voice settings, or None.
+
+        Args:
+            text (str): Cleaned text of one chunk
+            voice (str): Voice name
+            rate (str): Speaking rate adjustment
+            pitch (str): Pitch adjustment
+        Returns:
+            bytes: The cached audio, or None on a miss
+        """
+        key = self.make_key(text, voice, rate, pitch)
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return audio
+            spilled = key in self._spilled
+        if spilled:
+            try:
+                with open(self._spill_path(key), "rb") as f:
+                    audio = f.read()
+            except OSError:
+                audio = None
+            if audio:
+                with self._lock:
+                    self._disk_hits += 1
+                self._store(key, audio)
+                return audio
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, text, voice, audio, rate=TTS_RATE, pitch=TTS_PITCH, pin=False):
+        """Stores synthesized audio; pinned entries stay in memory permanently."""
+        if audio:
+            self._store(self.make_key(text, voice, rate, pitch), audio, pin)
+
+    def _store(self, key, audio, pin=False):
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = audio
+            self._bytes += len(audio)
+            if pin:
+                self._pinned.add(key)
+            for candidate in list(self._entries):
+                if self._bytes <= self.max_bytes:
+                    break
+                if candidate in self._pinned or candidate == key:
+                    continue
+                dropped = self._entries.pop(candidate)
+                self._bytes -= len(dropped)
+                evicted.append((candidate, dropped))
+        if self.spill_dir:
+            # Pinned phrases are written through so the next start finds them on disk
+            for spill_key, spill_audio in evicted + ([(key, audio)] if pin else []):
+                self._spill(spill_key, spill_audio)
+
+    def _spill(self, key, audio):
+        with self._lock:
+            if key in self._spilled:
+                return
+        try:
+            with open(self._spill_path(key), "wb") as f:
+                f.write(audio)
+        except OSError as e:
+            print(f"Could not spill TTS audio to disk: {e}")
+            return
+        removed = []
+        with self._lock:
+            self._spilled[key] = len(audio)
+            self._spilled_bytes += len(audio)
+            for old_key in list(self._spilled):
+                if self._spilled_bytes <= self.spill_max_bytes:
+                    break
+                if old_key in self._pinned or old_key == key:
+                    continue
+                self._spilled_bytes -= self._spilled.pop(old_key)
+                removed.append(old_key)
+        for old_key in removed:
+            try:
+                os.remove(self._spill_path(old_key))
+            except OSError:
+                pass
+
+    async def prewarm(self, phrases, voice="en-US-AriaNeural"):
+        """
+        Synthesizes and pins the chunks of fixed phrases that are not cached yet,
+        so they play without any synthesis latency.
+
+        Args:
+            phrases: Texts to pre-warm, split into chunks exactly as text_to_speech would
+            voice (str): Voice to pre-warm for
+        Returns:
+            int: Number of chunks that had to be synthesized
+        """
+        synthesized = 0
+        for phrase in phrases:
+            for chunk in split_into_chunks(clean_text(phrase)):
+                audio = self.get(chunk, voice)
+                if audio is None:
+                    audio = await text_to_audio_bytes(chunk, voice)
+                    synthesized += 1
+                self.put(chunk, voice, audio, pin=True)
+        return synthesized
+
+    def stats(self):
+        """Hit/miss counters and current memory and disk usage."""
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "pinned": len(self._pinned),
+                "bytes": self._bytes,
+                "spilled_entries": len(self._spilled),
+                "spilled_bytes": self._spilled_bytes,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+# Shared audio cache; set FALCON_TTS_CACHE_DIR to let evicted audio spill to disk
+TTS_CACHE = TTSCache(spill_dir=os.getenv("FALCON_TTS_CACHE_DIR"))
+
+def prewarm_tts_cache(phrases=COMMON_PHRASES, voice="en-US-AriaNeural"):
+    """Pre-warms TTS_CACHE on the speech worker's event loop without blocking the caller."""
+    def report(future):
+        try:
+            print(f"TTS cache pre-warmed ({future.result()} phrases synthesized).")
+        except Exception as e:
+            print(f"Could not pre-warm TTS cache: {e}")
+
+    get_speech_worker().run_coroutine(TTS_CACHE.prewarm(phrases, voice)).add_done_callback(report)
+
+class LocalSynthesizer:
+    """
+    Offline CPU voice used as a fallback when edge-tts is slow or unreachable.
+    Prefers the espeak-ng (or espeak) command line, which writes WAV to stdout,
+    and otherwise uses pyttsx3 if it is installed.
+    """
+
+    def __init__(self, rate=185):
+        self.rate = rate
+        self.command = shutil.which("espeak-ng") or shutil.which("espeak")
+        self._pyttsx3_engine = None
+        # pyttsx3 drivers (SAPI5 on Windows) must stay on the thread that created them
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="FalconLocalTTS")
+
+    @property
+    def name(self):
+        if self.command:
+            return os.path.basename(self.command)
+        return "pyttsx3" if pyttsx3 is not None else None
+
+    def available(self):
+        return self.name is not None
+
+    def synthesize(self, text):
+        """
+        Synthesizes text to WAV bytes (blocking; runs on the synthesizer's own thread).
+
+        Args:
+            text (str): Cleaned text of one chunk
+        Returns:
+            bytes: WAV audio
+        """
+        if self.command:
+            result = subprocess.run(
+                [self.command, "--stdout", "-s", str(self.rate), text],
+                capture_output=True, timeout=30, check=True,
+            )
+            return result.stdout
+        return self._synthesize_pyttsx3(text)
+
+    def _synthesize_pyttsx3(self, text):
+        if pyttsx3 is None:
+            raise RuntimeError("No local TTS engine available (install espeak-ng or pyttsx3)")
+        if self._pyttsx3_engine is None:
+            self._pyttsx3_engine = pyttsx3.init()
+            self._pyttsx3_engine.setProperty("rate", self.rate)
+        handle, path = tempfile.mkstemp(suffix=".wav")
+        os.close(handle)
+        try:
+            self._pyttsx3_engine.save_to_file(text, path)
+            self._pyttsx3_engine.runAndWait()
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def synthesize_async(self, text):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.synthesize, text)
+
+class HedgedSynthesizer:
+    """
+    Hedged speech synthesis: edge-tts is started first, and if no audio has arrived
+    by the deadline, the local engine is started too and whichever finishes first is used.
+    The deadline follows edge-tts's own recent p95 latency (clamped to
+    [min_deadline, max_deadline]), so a healthy service is rarely hedged while a slow
+    one falls back quickly. An edge-tts failure falls back to the local engine at once.
+    """
+
+    def __init__(self, local=None, initial_deadline=1.0, min_deadline=0.4, max_deadline=2.5, min_samples=5):
+        self.local = local or LocalSynthesizer()
+        self.initial_deadline = initial_deadline
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self.min_samples = min_samples
+        self.latency = LatencyRegistry()
+        self.wins = Counter()
+        self.failures = Counter()
+        self.hedged = 0
+
+    def deadline(self):
+        """Seconds to wait for edge-tts before starting the local engine."""
+        edge = self.latency["edge"]
+        if edge.count < self.min_samples:
+            return self.initial_deadline
+        return min(self.max_deadline, max(self.min_deadline, edge.percentile(0.95) / 1000.0))
+
+    async def _timed(self, engine, coroutine):
+        start = time.perf_counter()
+        try:
+            audio = await coroutine
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.failures[engine] += 1
+            raise
+        self.latency.record(engine, time.perf_counter() - start)
+        return audio
+
+    async def synthesize(self, text, voice):
+        """
+        Synthesizes one chunk, hedging against a slow or failing edge-tts.
+
+        Args:
+            text (str): Cleaned text of one chunk
+            voice (str): edge-tts voice
+        Returns:
+            tuple: (audio bytes, engine name) where the engine is "edge" or "local"
+        """
+        edge = asyncio.ensure_future(self._timed("edge", text_to_audio_bytes(text, voice)))
+        await asyncio.wait({edge}, timeout=self.deadline())
+        if edge.done() and not edge.exception():
+            self.wins["edge"] += 1
+            return edge.result(), "edge"
+        if not self.local.available():
+            audio = await edge
+            self.wins["edge"] += 1
+            return audio, "edge"
+
+        self.hedged += 1
+        local = asyncio.ensure_future(self._timed("local", self.local.synthesize_async(text)))
+        pending = {local} if edge.done() else {edge, local}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception():
+                    error = task.exception()
+                    continue
+                engine = "edge" if task is edge else "local"
+                self.wins[engine] += 1
+                if engine == "local" and not edge.done():
+                    # Let edge-tts finish in the background so the next time this text is cached in the neural voice
+                    edge.add_done_callback(
+                        lambda t: TTS_CACHE.put(text, voice, t.result()) if not t.cancelled() and not t.exception() else None
+                    )
+                return task.result(), engine
+        raise error if error else RuntimeError("No TTS engine produced audio")
+
+    def stats(self):
+        """Current deadline, wins per engine, failures and per-engine latency."""
+        return {
+            "local_engine": self.local.name,
+            "deadline_ms": round(self.deadline() * 1000, 1),
+            "hedged": self.hedged,
+            "wins": dict(self.wins),
+            "failures": dict(self.failures),
+            "latency": self.latency.summary(),
+        }
+
+# Shared hedged synthesizer used by the speech worker
+TTS_SYNTHESIZER = HedgedSynthesizer()
+
+def split_into_chunks(text, min_chars=20):
+    """
+    Splits cleaned text into speech chunks at sentence boundaries.
+    Each sentence is its own chunk, so audio starts after the first sentence is synthesized
+    and recurring sentences hit the audio cache.
+
+    Args:
+        text (str): Cleaned text to split
+        min_chars (int): Shorter fragments are merged into the following sentence
+    Returns:
+        list: Chunks in speaking order
+    """
+    # Punctuation-only fragments such as a lone "..." carry nothing to synthesize
+    sentences = [s.strip() for s in re.split(r'(?<=[.!?;:])\s+', text) if re.search(r'\w', s)]
+    chunks = []
+    pending = ""
+    for sentence in sentences:
+        pending = f"{pending} {sentence}".strip()
+        if len(pending) >= min_chars:
+            chunks.append(pending)
+            pending = ""
+    if pending:
+        if chunks:
+            chunks[-1] = f"{chunks[-1]} {pending}"
+        else:
+            chunks.append(pending)
+    return chunks
+
+def _speech_channel():
+    """Mixer channel reserved for speech, so other sounds never take it over."""
+    if pygame.mixer.get_num_channels() < 1:
+        pygame.mixer.set_num_channels(8)
+    pygame.mixer.set_reserved(1)
+    return pygame.mixer.Channel(0)
+
+def _load_chunk(audio_data):
+    """
+    Decodes a synthesized chunk from memory to PCM once, in the mixer's own format,
+    so playback itself only copies samples.
+    """
+    return pygame.mixer.Sound(file=io.BytesIO(audio_data))
+
+class Utterance:
+    """
+    One queued piece of speech. Text can be added while it is already playing
+    (streamed answers) until close() is called; cancel() stops it wherever it is.
+    """
+
+    def __init__(self, loop, voice, priority):
+        self.voice = voice
+        self.priority = priority
+        self.created_at = time.perf_counter()
+        self.first_text_at = None
+        self.completed = False
+        self.cancelled = threading.Event()
+        self.cancel_requested_at = None
+        self.done = threading.Event()
+        self._loop = loop
+        self._chunks = None  # asyncio.Queue, created on the worker loop
+        self._wake = None  # asyncio.Event, created on the worker loop
+        self._closed = False
+
+    def _chunk_queue(self):
+        if self._chunks is None:
+            self._chunks = asyncio.Queue()
+        return self._chunks
+
+    def _put_chunk(self, chunk):
+        self._chunk_queue().put_nowait(chunk)
+
+    def _wake_event(self):
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        return self._wake
+
+    def _wake_up(self):
+        """Wakes the playback coroutine (runs on the worker loop)."""
+        self._wake_event().set()
+
+    def add(self, text):
+        """Appends cleaned text; it is split into chunks and synthesized in order."""
+        if self._closed or self.cancelled.is_set():
+            return
+        chunks = split_into_chunks(text)
+        if chunks and self.first_text_at is None:
+            self.first_text_at = time.perf_counter()
+        for chunk in chunks:
+            self._loop.call_soon_threadsafe(self._put_chunk, chunk)
+
+    def close(self):
+        """Marks the text complete; everything added so far is still spoken."""
+        if not self._closed:
+            self._closed = True
+            self._loop.call_soon_threadsafe(self._put_chunk, None)
+
+    def cancel(self):
+        """Stops playback (or drops the utterance if it has not started yet)."""
+        if self.cancelled.is_set():
+            return
+        self.cancel_requested_at = time.perf_counter()
+        self.cancelled.set()
+        self._loop.call_soon_threadsafe(self._wake_up)
+        self.close()
+
+    def wait(self, timeout=None):
+        """Blocks until the utterance has finished or was cancelled."""
+        return self.done.wait(timeout)
+
+class SpeechWorker:
+    """
+    Single persistent speech thread. It owns one asyncio event loop and the mixer,
+    and plays utterances from a priority queue (lower number first, FIFO within a
+    priority). All public methods only schedule work and return immediately.
+    """
+    PRIORITY_URGENT = 0
+    PRIORITY_NORMAL = 10
+
+    def __init__(self, voice="en-US-AriaNeural", on_state=None):
+        """
+        Args:
+            voice (str): Default voice for new utterances
+            on_state: Optional callable receiving 'speaking' when playback starts
+                and 'idle' once the queue has drained; called on the worker thread
+        """
+        self.voice = voice
+        self.on_state = on_state
+        self._loop = asyncio.new_event_loop()
+        self._queue = None  # asyncio.PriorityQueue, created on the worker loop
+        self._sequence = 0
+        self._pending = set()
+        self._current = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="FalconSpeech", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.PriorityQueue()
+        try:
+            init_mixer()
+        except pygame.error as e:
+            print(f"Failed to initialize pygame mixer: {e}")
+        self._ready.set()
+        self._loop.run_until_complete(self._serve())
+
+    def _submit(self, utterance):
+        with self._lock:
+            self._sequence += 1
+            self._pending.add(utterance)
+            item = (utterance.priority, self._sequence, utterance)
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    def enqueue(self, text=None, priority=PRIORITY_NORMAL, voice=None):
+        """
+        Queues speech behind whatever is playing or already queued.
+
+        Args:
+            text (str): Cleaned text to speak; leave empty to feed it later with add()
+            priority (int): Queue priority, lower plays first
+            voice (str): Voice override for this utterance
+        Returns:
+            Utterance: Handle to add text, close, cancel or wait on
+        """
+        utterance = Utterance(self._loop, voice or self.voice, priority)
+        if text is not None:
+            utterance.add(text)
+            utterance.close()
+        self._submit(utterance)
+        return utterance
+
+    def replace(self, text=None, priority=PRIORITY_NORMAL, voice=None):
+        """Cancels current and queued speech, then queues this text (see enqueue)."""
+        self.cancel()
+        return self.enqueue(text, priority, voice)
+
+    def cancel(self):
+        """Stops the current utterance and drops everything queued (barge-in)."""
+        with self._lock:
+            targets = list(self._pending)
+        for utterance in targets:
+            utterance.cancel()
+
+    def is_speaking(self):
+        """True while an utterance is being synthesized or played."""
+        with self._lock:
+            return self._current is not None
+
+    def run_coroutine(self, coroutine):
+        """Runs a coroutine on the worker loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def close(self):
+        """Cancels all speech and stops the worker thread."""
+        self.cancel()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (float("inf"), 0, None))
+        self._thread.join(timeout=2.0)
+
+    def _notify(self, state):
+        if self.on_state:
+            try:
+                self.on_state(state)
+            except Exception as e:
+                print(f"Speech state callback failed: {e}")
+
+    async def _serve(self):
+        speaking = False
+        while True:
+            _, _, utterance = await self._queue.get()
+            if utterance is None:
+                break
+            if not utterance.cancelled.is_set():
+                with self._lock:
+                    self._current = utterance
+                if not speaking:
+                    speaking = True
+                    self._notify('speaking')
                 try:
-                    # Delete files older than 2 minutes
-                    if current_time - os.path.getctime(file_path) > 120:
-                        os.remove(file_path)
-                        print(f"Cleaned up old TTS file: {filename}")
-                except (OSError, FileNotFoundError):
-                    # File might be in use or already deleted
+                    utterance.completed = await self._play(utterance)
+                except Exception as e:
+                    print(f"Text-to-speech error: {e}")
+            with self._lock:
+                self._current = None
+                self._pending.discard(utterance)
+            utterance.done.set()
+            if speaking and self._queue.empty():
+                speaking = False
+                self._notify('idle')
+
+    async def _produce(self, utterance, ready):
+        """
+        Synthesizes chunks in order, so chunk N+1 is generated while chunk N plays.
+        Cache misses go through the hedged synthesizer.
+        """
+        try:
+            while True:
+                chunk = await utterance._chunk_queue().get()
+                if chunk is None or utterance.cancelled.is_set():
+                    break
+                audio = TTS_CACHE.get(chunk, utterance.voice)
+                if audio is None:
+                    audio, engine = await TTS_SYNTHESIZER.synthesize(chunk, utterance.voice)
+                    # Only the neural voice is cached; a local fallback is used just this once
+                    if engine == "edge":
+                        TTS_CACHE.put(chunk, utterance.voice, audio)
+                ready.put_nowait(audio)
+                utterance._wake_up()
+        except Exception as e:
+            ready.put_nowait(e)
+        finally:
+            ready.put_nowait(None)
+            utterance._wake_up()
+
+    async def _play(self, utterance):
+        """
+        Plays one utterance, queueing each next chunk on the speech channel before
+        the current one ends, so playback is gapless whenever synthesis keeps up.
+        Nothing is polled: the coroutine sleeps until a chunk has been synthesized,
+        a stop is requested, or the audio it scheduled is due to end.
+
+        Returns:
+            bool: True if playback completed, False if cancelled or failed
+        """
+        started_at = time.perf_counter()
+        ready = asyncio.Queue()
+        wake = utterance._wake_event()
+        producer = asyncio.ensure_future(self._produce(utterance, ready))
+        channel = _speech_channel()
+        next_sound = None
+        slot_free_at = None  # when the channel's queue slot frees up (current chunk ends)
+        scheduled_end = None  # when the last scheduled chunk finishes playing
+        synthesis_done = False
+        failed = False
+        played = 0
+
+        try:
+            while not utterance.cancelled.is_set():
+                wake.clear()
+
+                # Decode the next chunk as soon as it has been synthesized
+                if next_sound is None and not synthesis_done and not ready.empty():
+                    item = ready.get_nowait()
+                    if item is None:
+                        synthesis_done = True
+                    elif isinstance(item, Exception):
+                        print(f"Error generating TTS audio: {item}")
+                        failed = True
+                    else:
+                        next_sound = _load_chunk(item)
                     continue
-    except Exception as e:
-        print(f"Error during TTS cleanup: {e}")
+
+                # Hand it to the mixer while the current chunk is still playing
+                if next_sound is not None and channel.get_queue() is None:
+                    now = time.perf_counter()
+                    if played == 0:
+                        channel.play(next_sound)
+                        TTS_METRICS.record("time_to_first_audio", now - max(started_at, utterance.first_text_at or started_at))
+                        print("TTS playback started")
+                        slot_free_at, scheduled_end = now, now + next_sound.get_length()
+                    elif channel.get_busy():
+                        channel.queue(next_sound)
+                        TTS_METRICS.record("inter_chunk_gap", max(0.0, now - scheduled_end))
+                        slot_free_at = max(now, scheduled_end)
+                        scheduled_end = slot_free_at + next_sound.get_length()
+                    else:
+                        channel.play(next_sound)
+                        TTS_METRICS.record("inter_chunk_gap", max(0.0, now - scheduled_end))
+                        slot_free_at, scheduled_end = now, now + next_sound.get_length()
+                    next_sound = None
+                    played += 1
+                    continue
+
+                if synthesis_done and next_sound is None and not channel.get_busy():
+                    if played and not failed:
+                        print("TTS playback completed")
+                    return played > 0 and not failed
+
+                # Sleep until woken by the producer or a stop, or until the audio we are waiting on ends
+                if next_sound is not None:
+                    deadline = slot_free_at
+                elif synthesis_done or channel.get_busy():
+                    deadline = scheduled_end
+                else:
+                    deadline = None
+                timeout = None
+                if deadline is not None:
+                    # The mixer lags the wall clock by up to one buffer; never spin tighter than 5 ms
+                    timeout = max(0.005, deadline - time.perf_counter())
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+            print("TTS playback interrupted")
+            return False
+        finally:
+            producer.cancel()
+            audible = played > 0 and channel.get_busy()
+            channel.stop()
+            if audible and utterance.cancel_requested_at is not None:
+                BARGE_IN_LATENCY.record(time.perf_counter() - utterance.cancel_requested_at)
+
+_speech_worker = None
+_speech_worker_lock = threading.Lock()
+
+def get_speech_worker():
+    """Returns the shared SpeechWorker, starting it on first use."""
+    global _speech_worker
+    with _speech_worker_lock:
+        if _speech_worker is None:
+            _speech_worker = SpeechWorker()
+        return _speech_worker
 
 def text_to_speech(text, callback_func=None, voice="en-US-AriaNeural"):
     """
-    Plays text as speech using pygame with improved interrupt handling.
+    Plays text as speech on the shared speech worker and waits for it to finish.
     
     Args:
         text (str): Text to speak
@@ -146,82 +839,43 @@ def text_to_speech(text, callback_func=None, voice="en-US-AriaNeural"):
     """
     if callback_func is None:
         callback_func = lambda: True
-        
-    audio_file = None
-    completed = False
-    
-    try:
-        # Initialize pygame mixer if not already initialized
-        if not pygame.mixer.get_init():
-            pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
 
-        # Clean up old files first
-        cleanup_old_tts_files()
-
-        # Generate the audio file
+    try:
         print(f"Generating TTS for: {text[:50]}...")
-        audio_file = asyncio.run(text_to_audio_file(text, voice))
-        
-        if not os.path.exists(audio_file):
-            print("Error: TTS audio file was not created")
-            return False
-
-        # Load and play the audio
-        pygame.mixer.music.load(audio_file)
-        pygame.mixer.music.play()
-        
-        print("TTS playback started")
-
-        # Wait while audio is playing with better interrupt checking
-        clock = pygame.time.Clock()
-        while pygame.mixer.music.get_busy():
-            # Check callback more frequently for better responsiveness
+        utterance = get_speech_worker().enqueue(text, voice=voice)
+        while not utterance.wait(0.02):
             if not callback_func():
                 print("TTS playback interrupted by callback")
-                pygame.mixer.music.stop()
+                utterance.cancel()
+                utterance.wait()
                 break
-            
-            # Small delay to prevent excessive CPU usage
-            clock.tick(50)  # Check 50 times per second
-            
-        else:
-            # Loop completed without break - playback finished normally
-            completed = True
-            print("TTS playback completed")
-
+        return utterance.completed
     except Exception as e:
         print(f"Text-to-speech error: {e}")
-        completed = False
+        return False
 
-    finally:
-        # Clean up
-        try:
-            if pygame.mixer.get_init():
-                pygame.mixer.music.stop()
-                # Unload the music to release the file
-                try:
-                    pygame.mixer.music.unload()
-                except:
-                    pass  # unload() might not be available in all pygame versions
-        except Exception as e:
-            print(f"Error stopping TTS: {e}")
-        
-        # Clean up the audio file after a short delay
-        if audio_file and os.path.exists(audio_file):
-            def delayed_cleanup():
-                time.sleep(0.5)  # Wait for file to be released
-                try:
-                    if os.path.exists(audio_file):
-                        os.remove(audio_file)
-                        print(f"Cleaned up TTS file: {os.path.basename(audio_file)}")
-                except (OSError, FileNotFoundError):
-                    pass  # File cleanup will happen in next cleanup cycle
-            
-            # Run cleanup in a separate thread
-            cleanup_thread = threading.Thread(target=delayed_cleanup, daemon=True)
-            cleanup_thread.start()
-    
-    return completed
+def prepare_speech_text(text):
+    """
+    Cleans text for speech and shortens very long text to its beginning plus a note
+    that the full response is on screen.
+
+    Args:
+        text (str): Raw response text
+    Returns:
+        str: Text ready to be spoken (empty if nothing speakable is left)
+    """
+    cleaned_text = clean_text(text)
+    if len(cleaned_text) <= LONG_TEXT_LIMIT:
+        return cleaned_text
+
+    print("Long text detected, speaking summary...")
+    # Split by sentences
+    sentences = re.split(r'(?<=[.!?])\s+', cleaned_text)
+    if len(sentences) > 2:
+        # Speak first couple of sentences with a note
+        return ' '.join(sentences[:2]) + f" ... {LONG_TEXT_NOTE}"
+    # If we don't have clear sentences, take first part
+    return cleaned_text[:LONG_TEXT_LIMIT // 2] + f"... {LONG_TEXT_NOTE}"
             
 def SpeakFalcon(text, callback_func=None, voice="en-US-AriaNeural"):
     """
@@ -237,43 +891,75 @@ def SpeakFalcon(text, callback_func=None, voice="en-US-AriaNeural"):
     if not text or not isinstance(text, str):
         print("SpeakFalcon: No valid text provided")
         return False
-        
-    if callback_func is None:
-        callback_func = lambda: True
     
     print(f"SpeakFalcon called with text length: {len(text)}")
     
-    # Clean the input text
-    cleaned_text = clean_text(text)
-    
-    if not cleaned_text:
-        print("SpeakFalcon: No valid text after cleaning")
-        return False
-    
     try:
-        # For very long text, speak only the beginning and add a note
-        if len(cleaned_text) > 800:
-            print("Long text detected, speaking summary...")
-            # Split by sentences
-            sentences = re.split(r'(?<=[.!?])\s+', cleaned_text)
-            
-            if len(sentences) > 2:
-                # Speak first couple of sentences with a note
-                shortened_text = ' '.join(sentences[:2])
-                shortened_text += " ... The complete response is displayed on screen."
-                return text_to_speech(shortened_text, callback_func, voice)
-            else:
-                # If we don't have clear sentences, take first part
-                shortened_text = cleaned_text[:400] + "... The complete response is displayed on screen."
-                return text_to_speech(shortened_text, callback_func, voice)
-        else:
-            # For shorter text, speak it all
-            return text_to_speech(cleaned_text, callback_func, voice)
+        speech_text = prepare_speech_text(text)
+        if not speech_text:
+            print("SpeakFalcon: No valid text after cleaning")
+            return False
+        return text_to_speech(speech_text, callback_func, voice)
             
     except Exception as e:
         print(f"Error in SpeakFalcon: {e}")
         return False
 
+class SentenceStreamer:
+    """
+    Collects streamed text deltas and hands complete sentences to `on_sentence`
+    as soon as they end, so speech can start before generation finishes.
+    Like SpeakFalcon, it stops after LONG_TEXT_LIMIT characters and adds a note.
+    """
+    SENTENCE_END = re.compile(r'(?<=[.!?])\s+|\n+')
+
+    def __init__(self, on_sentence, min_chars=12, max_chars=LONG_TEXT_LIMIT):
+        self.on_sentence = on_sentence
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.buffer = ""
+        self.spoken_chars = 0
+        self.truncated = False
+        self.emitted = 0
+
+    def feed(self, delta):
+        """Adds a text delta and emits every sentence it completes."""
+        if self.truncated or not delta:
+            return
+        self.buffer += delta
+        parts = self.SENTENCE_END.split(self.buffer)
+        # The last part is still being written
+        self.buffer = parts.pop()
+        pending = ""
+        for part in parts:
+            pending = f"{pending} {part}".strip()
+            # Very short fragments ("1." in a list) are merged into the next sentence
+            if len(clean_text(pending)) >= self.min_chars:
+                self._emit(pending)
+                pending = ""
+                if self.truncated:
+                    return
+        if pending:
+            self.buffer = f"{pending} {self.buffer}"
+
+    def close(self):
+        """Emits whatever is left once the stream has ended."""
+        if not self.truncated and self.buffer.strip():
+            self._emit(self.buffer.strip())
+        self.buffer = ""
+
+    def _emit(self, sentence):
+        sentence = clean_text(sentence)
+        if not sentence:
+            return
+        if self.spoken_chars + len(sentence) > self.max_chars and self.emitted >= 2:
+            self.truncated = True
+            self.on_sentence(LONG_TEXT_NOTE)
+            return
+        self.spoken_chars += len(sentence)
+        self.emitted += 1
+        self.on_sentence(sentence)
+
 # Alternative voices you can use
 AVAILABLE_VOICES = {
     'aria': 'en-US-AriaNeural',
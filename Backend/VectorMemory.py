@@ -0,0 +1,153 @@
+import re
+import math
+import zlib
+import threading
+import numpy as np
+
+
+class HashedTfidfEmbedder:
+    """
+    CPU-only text embedder based on the hashing trick.
+    Words and in-word character 4-grams are hashed into a fixed number of signed
+    buckets, so no vocabulary has to be stored and any new note can be embedded
+    immediately. IDF weighting is applied at query time by MemoryVectorIndex.
+    """
+
+    def __init__(self, dim: int = 1024, stop_words: frozenset = frozenset(), ngram: int = 4, ngram_weight: float = 0.5):
+        self.dim = dim
+        self.stop_words = stop_words
+        self.ngram = ngram
+        self.ngram_weight = ngram_weight
+
+    def _features(self, text: str):
+        for word in re.findall(r"\w+", text.lower()):
+            if len(word) < 2 or word in self.stop_words:
+                continue
+            yield word, 1.0
+            padded = f"<{word}>"
+            for i in range(len(padded) - self.ngram + 1):
+                yield padded[i:i + self.ngram], self.ngram_weight
+
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Embeds text as a sublinear term-frequency vector.
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            np.ndarray: float32 vector of length `dim` (all zeros for empty text)
+        """
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            # crc32 is stable across processes, unlike the salted built-in hash()
+            h = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if h & 0x80000000 else -1.0
+            vector[h % self.dim] += sign * weight
+        # Sublinear damping so one repeated word cannot dominate a note
+        return np.sign(vector) * np.log1p(np.abs(vector))
+
+
+class MemoryVectorIndex:
+    """
+    In-memory top-k cosine index over long-term memory notes.
+    Rows are added and removed incrementally; the IDF-weighted, normalised
+    matrix is rebuilt lazily on the next search after a change.
+    """
+
+    def __init__(self, dim: int = 1024, stop_words: frozenset = frozenset()):
+        self.embedder = HashedTfidfEmbedder(dim=dim, stop_words=stop_words)
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self._doc_freq = np.zeros(dim, dtype=np.float32)
+        self._normalized = None
+        self._idf = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embedder.embed(text)
+
+    def to_blob(self, vector: np.ndarray) -> bytes:
+        return np.asarray(vector, dtype=np.float32).tobytes()
+
+    def from_blob(self, blob: bytes):
+        """Decodes a stored vector, or returns None if it was written with another dimension."""
+        vector = np.frombuffer(blob, dtype=np.float32)
+        return vector if vector.shape[0] == self.dim else None
+
+    def add(self, memory_id: int, vector: np.ndarray):
+        """Adds (or replaces) the vector for a memory note."""
+        with self._lock:
+            self._remove_locked(memory_id)
+            if self._size == self._vectors.shape[0]:
+                capacity = max(64, self._size * 2)
+                vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+                vectors[:self._size] = self._vectors[:self._size]
+                ids = np.zeros(capacity, dtype=np.int64)
+                ids[:self._size] = self._ids[:self._size]
+                self._vectors, self._ids = vectors, ids
+            self._vectors[self._size] = vector
+            self._ids[self._size] = memory_id
+            self._size += 1
+            self._doc_freq += vector != 0
+            self._normalized = None
+
+    def remove(self, memory_id: int) -> bool:
+        """Removes a memory note from the index."""
+        with self._lock:
+            return self._remove_locked(memory_id)
+
+    def _remove_locked(self, memory_id: int) -> bool:
+        matches = np.flatnonzero(self._ids[:self._size] == memory_id)
+        if matches.size == 0:
+            return False
+        row = matches[0]
+        last = self._size - 1
+        self._doc_freq -= self._vectors[row] != 0
+        # Swap-remove keeps the live rows contiguous without shifting the whole matrix
+        self._vectors[row] = self._vectors[last]
+        self._ids[row] = self._ids[last]
+        self._size = last
+        self._normalized = None
+        return True
+
+    def _ensure_normalized(self):
+        if self._normalized is not None:
+            return
+        self._idf = (np.log((1.0 + self._size) / (1.0 + self._doc_freq)) + 1.0).astype(np.float32)
+        weighted = self._vectors[:self._size] * self._idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._normalized = weighted / norms
+
+    def search(self, text: str, k: int = 5, min_score: float = 0.15) -> list[tuple[int, float]]:
+        """
+        Returns up to k (memory_id, cosine score) pairs, best first.
+
+        Args:
+            text (str): Free-form query, e.g. the raw user utterance
+            k (int): Maximum number of results
+            min_score (float): Results below this cosine similarity are dropped
+
+        Returns:
+            list[tuple[int, float]]: Matching memory IDs with their scores
+        """
+        query = self.embed(text)
+        with self._lock:
+            if self._size == 0 or not query.any():
+                return []
+            self._ensure_normalized()
+            query = query * self._idf
+            norm = float(np.linalg.norm(query))
+            if norm == 0.0 or math.isnan(norm):
+                return []
+            scores = self._normalized @ (query / norm)
+            k = min(k, self._size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(self._ids[i]), float(scores[i])) for i in top if scores[i] >= min_score]
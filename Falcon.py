@@ -4,8 +4,10 @@ import eel
 import os
 import sys
 import threading
+import itertools
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Add current directory to Python path
@@ -15,9 +17,13 @@ if current_dir not in sys.path:
 
 # Import backend modules
 try:
-    from Backend.Brain import FALCONAssistant
+    from Backend.Brain import FALCONAssistant, CompletionCancelled
+    from Backend.Speculation import SpeculativeDispatcher
     # Import your custom TTS function
-    from Backend.TTS import SpeakFalcon
+    from Backend.TTS import (
+        SentenceStreamer, TTS_METRICS, TTS_CACHE, TTS_SYNTHESIZER, BARGE_IN_LATENCY, COMMON_PHRASES,
+        get_speech_worker, prepare_speech_text, prewarm_tts_cache
+    )
 except ImportError as e:
     print(f"Critical Import Error: {e}. Ensure Backend/Brain.py and Backend/TTS.py exist.")
     sys.exit(1)
@@ -26,114 +32,178 @@ except Exception as ex:
     sys.exit(1)
 
 
-# --- TTS Manager for Stoppable, Threaded Speech using your SpeakFalcon ---
+# Pushed through query_result for a query the user stopped
+CANCELLED_RESULT = {'response': None, 'cancelled': True, 'should_speak': False, 'speech_started': False}
+
+# Fixed replies; their audio is pre-warmed in the TTS cache at startup
+NO_INPUT_RESPONSE = "I didn't quite catch that. Could you please repeat?"
+NOT_INITIALIZED_RESPONSE = "Assistant is not initialized. Please restart the application."
+PROCESSING_ERROR_RESPONSE = "I've encountered an issue processing your request. Please try again."
+FALLBACK_RESPONSE = "I'm not sure how to respond to that."
+
+
+# --- TTS Manager: non-blocking front end to the persistent speech worker ---
 class TTSManager:
     """
-    Manages TTS playback in a non-blocking thread, allowing for interruption.
-    This class is a wrapper around your existing SpeakFalcon function.
+    Manages TTS playback on the persistent speech worker in Backend/TTS.py, allowing for interruption.
+    Every method only schedules work on the worker and returns immediately;
+    synthesis, playback and the mixer all live on the worker's thread.
     """
     def __init__(self):
-        self.tts_thread = None
-        self.stop_event = threading.Event()
-        self.is_speaking = False
+        self.worker = None
+        self.stream = None
         self.lock = threading.Lock()
+        # (response text, Utterance) of the last reply the backend started speaking itself
+        self.spoken = None
+
+    def _get_worker(self):
+        with self.lock:
+            if self.worker is None:
+                self.worker = get_speech_worker()
+                self.worker.on_state = self._notify_frontend
+            return self.worker
+
+    @staticmethod
+    def _notify_frontend(status):
+        """Called on the speech worker when speech starts ('speaking') and when it drains ('idle')."""
+        try:
+            eel.notify_tts_status(status)
+        except Exception as e:
+            print(f"Could not notify frontend of TTS status '{status}': {e}")
 
     def speak(self, text_to_speak):
         """
-        Speaks the given text in a non-blocking thread.
-        If speech is already playing, it stops it first.
+        Speaks the given text, replacing anything that is currently playing or queued.
+        Long answers are shortened the same way SpeakFalcon does.
+        Returns True if speech was started.
         """
-        with self.lock:
-            if self.tts_thread and self.tts_thread.is_alive():
-                self.stop()
-                self.tts_thread.join(timeout=2.0)  # Wait for the previous thread to terminate
-
-            self.stop_event.clear()  # Reset the stop signal for the new speech task
-            
-            self.tts_thread = threading.Thread(
-                target=self._run_tts_in_thread,
-                args=(text_to_speak,),
-                daemon=True
-            )
-            self.tts_thread.start()
-
-    def _run_tts_in_thread(self, text):
+        speech_text = prepare_speech_text(text_to_speak)
+        if not speech_text:
+            print("TTS Request Ignored: No valid text after cleaning.")
+            return False
+        print(f"TTS Playback initiated: {speech_text[:50]}...")
+        self.stream = None
+        self.mark_spoken(text_to_speak, self._get_worker().replace(speech_text))
+        return True
+
+    def mark_spoken(self, response_text, utterance):
+        """Records the reply an utterance speaks, so a later request_tts for it is skipped."""
+        self.spoken = ((response_text or "").strip(), utterance)
+
+    def is_already_spoken(self, response_text):
+        """True if this reply is being spoken by the backend right now (not interrupted, not finished)."""
+        spoken = self.spoken
+        return (spoken is not None and spoken[0] == (response_text or "").strip()
+                and not spoken[1].cancelled.is_set() and not spoken[1].done.is_set())
+
+    def begin_stream(self):
         """
-        The actual worker function that runs in a separate thread.
+        Starts an utterance that speaks sentences as they are fed in with feed(),
+        in order, until end_stream() is called. Any ongoing speech is stopped first.
+        Returns the Utterance, so a caller can keep feeding its own stream.
         """
-        try:
-            with self.lock:
-                self.is_speaking = True
-            
-            # Notify frontend that speech has started
-            try:
-                eel.notify_tts_status('speaking')
-            except Exception as e:
-                print(f"Could not notify frontend of TTS start: {e}")
-            
-            print(f"TTS Playback initiated: {text[:50]}...")
-            
-            # The callback function checks our stop_event.
-            # If stop() is called, the event is set, the callback returns False,
-            # and your SpeakFalcon's while loop breaks.
-            def stoppable_callback():
-                return not self.stop_event.is_set()
-            
-            # Call your function with the stoppable callback
-            # Add error handling for SpeakFalcon
-            try:
-                # Check if SpeakFalcon accepts callback_func parameter
-                # If not, you may need to modify your TTS.py to support interruption
-                SpeakFalcon(text, callback_func=stoppable_callback)
-            except TypeError:
-                # Fallback if SpeakFalcon doesn't accept callback_func
-                print("Warning: SpeakFalcon doesn't support callback. TTS won't be interruptible.")
-                SpeakFalcon(text)
-            except Exception as tts_error:
-                print(f"Error in SpeakFalcon: {tts_error}")
+        self.stream = self._get_worker().replace()
+        return self.stream
 
-        except Exception as e:
-            print(f"Error during TTS playback in thread: {e}")
-        finally:
-            # This block runs whether the speech finished naturally or was stopped.
-            with self.lock:
-                self.is_speaking = False
-            
-            print("TTS playback finished or was stopped.")
-            self.stop_event.clear()  # Reset the event for the next run
-            
-            # Notify frontend that speech is no longer active
-            try:
-                eel.notify_tts_status('idle')
-            except Exception as e:
-                print(f"Could not notify frontend of TTS end: {e}")
+    def feed(self, sentence):
+        """Adds one sentence to the active speech stream."""
+        if self.stream is not None:
+            self.stream.add(sentence)
+
+    def end_stream(self):
+        """Marks the active stream complete; queued sentences are still spoken."""
+        if self.stream is not None:
+            self.stream.close()
 
     def stop(self):
         """
-        Signals the currently running TTS thread to stop playback.
+        Stops current and queued speech.
         This is used for the "barge-in" feature.
         """
         print("TTS stop request received.")
-        self.stop_event.set()
+        self._get_worker().cancel()
 
     def is_currently_speaking(self):
         """Check if TTS is currently active"""
-        with self.lock:
-            return self.is_speaking
+        return self.worker is not None and self.worker.is_speaking()
 
 # --- End of TTS Manager ---
 
 
+# --- Query Manager: keeps model calls off eel's gevent loop ---
+class QueryManager:
+    """
+    Runs queries on a small thread pool. eel serves every exposed call from one gevent
+    loop that is not monkeypatched, so a blocking Groq request there would stall stop_tts
+    and get_system_status. Each query gets a request ID, and its result is pushed to the
+    page with eel.query_result. Submitting a new query cancels the one in flight.
+    """
+    def __init__(self, max_workers=2):
+        # Two workers: a cancelled query may still be waiting for its first chunk
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="FalconQuery")
+        self.lock = threading.Lock()
+        self.request_ids = itertools.count(1)
+        self.active = None  # (request_id, cancel_event) of the query in flight
+
+    def submit(self, user_query_text):
+        """Queues a query, cancelling the previous one. Returns its request ID."""
+        cancel_event = threading.Event()
+        with self.lock:
+            request_id = next(self.request_ids)
+            previous, self.active = self.active, (request_id, cancel_event)
+        if previous is not None:
+            print(f"Cancelling query {previous[0]} in favour of query {request_id}")
+            previous[1].set()
+        self.pool.submit(self._run, request_id, user_query_text, cancel_event)
+        return request_id
+
+    def cancel(self):
+        """Cancels the query in flight and pushes a cancelled result for it. Returns True if there was one."""
+        with self.lock:
+            previous, self.active = self.active, None
+        if previous is None:
+            return False
+        print(f"Cancelling query {previous[0]}")
+        previous[1].set()
+        self._push(previous[0], CANCELLED_RESULT)
+        return True
+
+    @staticmethod
+    def _push(request_id, result):
+        try:
+            eel.query_result(request_id, result)
+        except Exception as e:
+            print(f"Could not push result of query {request_id} to frontend: {e}")
+
+    def _run(self, request_id, user_query_text, cancel_event):
+        try:
+            result = run_streaming_query(user_query_text, request_id, cancel_event)
+        except Exception as e:
+            print(f"Critical Error in query {request_id}: {e}")
+            result = fixed_reply(PROCESSING_ERROR_RESPONSE, True)
+        with self.lock:
+            if self.active is not None and self.active[0] == request_id:
+                self.active = None
+        if result is None or cancel_event.is_set():
+            return  # superseded or stopped; the page has already moved on
+        self._push(request_id, result)
+
+# --- End of Query Manager ---
+
+
 # Initialize the TTS Manager and FALCON Assistant
 tts_manager = TTSManager()
+query_manager = QueryManager()
 assistant = None
+speculator = None
 
 def initialize_assistant():
     """Initialize assistant with proper error handling"""
-    global assistant
+    global assistant, speculator
     try:
         print("Initializing FALCON Assistant...")
         assistant = FALCONAssistant()
+        speculator = SpeculativeDispatcher(assistant)
         print("FALCON Assistant initialized successfully.")
         return True
     except ValueError as ve:
@@ -148,6 +218,9 @@ assistant_ready = initialize_assistant()
 if not assistant_ready:
     print("Failed to initialize FALCON Assistant. Will attempt to continue with limited functionality...")
 
+# Synthesize the fixed replies in the background so they play without synthesis latency
+prewarm_tts_cache(COMMON_PHRASES + (NO_INPUT_RESPONSE, NOT_INITIALIZED_RESPONSE, PROCESSING_ERROR_RESPONSE, FALLBACK_RESPONSE))
+
 # Verify web folder exists
 web_folder = os.path.join(current_dir, 'web')
 if not os.path.isdir(web_folder):
@@ -165,45 +238,158 @@ if not os.path.isdir(web_folder):
 eel.init(web_folder)
 
 @eel.expose
-def process_user_query(user_query_text: str):
+def speculate_query(interim_text: str):
+    """
+    Receives a stable interim transcript from the page and starts the model round-trip
+    for it ahead of the final transcript. Returns immediately.
+    """
+    if not speculator or not isinstance(interim_text, str):
+        return False
+    try:
+        return speculator.on_interim(interim_text)
+    except Exception as e:
+        print(f"Speculation failed: {e}")
+        return False
+
+@eel.expose
+def cancel_speculation():
     """
-    Process user query with FALCONAssistant and return response.
-    This function matches exactly what the HTML expects.
+    Called by the page when recognition ends or finds no match without a final
+    transcript: drops the speculative turn instead of letting it run to completion.
+    """
+    if not speculator:
+        return False
+    try:
+        speculator.cancel()
+        return True
+    except Exception as e:
+        print(f"Could not cancel speculative turn: {e}")
+        return False
+
+def claim_speculation(user_query_text: str):
+    """Returns the speculative turn started for this exact query, if any."""
+    if not speculator:
+        return None
+    try:
+        return speculator.claim(user_query_text)
+    except Exception as e:
+        print(f"Could not claim speculative turn: {e}")
+        return None
+
+def fixed_reply(response_text, speak_on_server):
+    """Response dict for a canned reply, spoken right away when `speak_on_server` is set."""
+    speech_started = False
+    if speak_on_server:
+        try:
+            speech_started = tts_manager.speak(response_text)
+        except Exception as e:
+            print(f"Error initiating TTS: {e}")
+    return {'response': response_text, 'should_speak': True, 'speech_started': speech_started}
+
+def run_streaming_query(user_query_text: str, request_id=None, cancel_event=None):
+    """
+    Runs one query, pushing answer text to the page through the JS `stream_token`
+    callback and speaking complete sentences as soon as they arrive.
+
+    Args:
+        user_query_text (str): The user's query
+        request_id (int, optional): Tag passed along with every streamed token
+        cancel_event (threading.Event, optional): Aborts the query once set
+
+    Returns:
+        dict: Response dict pushed through query_result, or None if cancelled
     """
     print(f"User Query: {user_query_text}")
-    
-    # Validate input
     if not user_query_text or not user_query_text.strip():
-        no_input_response = "I didn't quite catch that. Could you please repeat?"
-        return {'response': no_input_response, 'should_speak': True}
-
+        return fixed_reply(NO_INPUT_RESPONSE, True)
     if not assistant:
-        error_response = "Assistant is not initialized. Please restart the application."
-        return {'response': error_response, 'should_speak': True}
+        return fixed_reply(NOT_INITIALIZED_RESPONSE, True)
+
+    spoken_sentences = []
+    # This query's own utterance: a superseded query must not feed the next one's speech
+    utterance = None
+
+    def on_sentence(sentence):
+        nonlocal utterance
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        if utterance is None:
+            utterance = tts_manager.begin_stream()
+        spoken_sentences.append(sentence)
+        utterance.add(sentence)
+
+    streamer = SentenceStreamer(on_sentence)
+
+    def on_token(delta):
+        try:
+            eel.stream_token(delta, request_id)
+        except Exception as e:
+            print(f"Could not push token to frontend: {e}")
+        streamer.feed(delta)
 
     try:
-        # Stop any ongoing TTS before processing new query
         if tts_manager.is_currently_speaking():
             print("Stopping ongoing TTS due to new query...")
             tts_manager.stop()
-            time.sleep(0.1)  # Brief pause to ensure TTS stops
-        
-        # Process the query
-        ai_response_text = assistant.process_message(user_query_text)
+
+        ai_response_text = assistant.process_message(
+            user_query_text, on_token=on_token, speculation=claim_speculation(user_query_text), cancel_event=cancel_event
+        )
         print(f"FALCON Response: {ai_response_text}")
-        
-        # Determine if we should speak the response
-        should_speak = bool(ai_response_text and ai_response_text.strip())
+        if cancel_event is not None and cancel_event.is_set():
+            # Stopped after the answer was complete; don't keep speaking it
+            raise CompletionCancelled()
+
+        streamer.close()
+        if not spoken_sentences:
+            # Nothing was streamed (e.g. an error message); speak the final text instead
+            fallback = SentenceStreamer(on_sentence)
+            fallback.feed(ai_response_text or "")
+            fallback.close()
+        if utterance is not None:
+            utterance.close()
+            tts_manager.mark_spoken(ai_response_text, utterance)
 
         return {
-            'response': ai_response_text or "I'm not sure how to respond to that.", 
-            'should_speak': should_speak
+            'response': ai_response_text or FALLBACK_RESPONSE,
+            'should_speak': bool(ai_response_text and ai_response_text.strip()),
+            'speech_started': bool(spoken_sentences)
         }
-    
+
+    except CompletionCancelled:
+        print(f"Query {request_id} cancelled: {user_query_text[:50]}")
+        if utterance is not None:
+            utterance.cancel()
+        return None
     except Exception as e:
-        print(f"Critical Error in process_user_query: {str(e)}")
-        error_response = "I've encountered an issue processing your request. Please try again."
-        return {'response': error_response, 'should_speak': True}
+        print(f"Critical Error in run_streaming_query: {str(e)}")
+        if utterance is not None:
+            utterance.cancel()
+        return fixed_reply(PROCESSING_ERROR_RESPONSE, True)
+
+@eel.expose
+def submit_query(user_query_text: str):
+    """
+    Runs a query without blocking eel's loop.
+    The query runs on the query pool; answer text is pushed through the JS `stream_token`
+    callback while it is generated, complete sentences are spoken as soon as they arrive,
+    and the result dict is pushed through `query_result(request_id, result)`. The dict has
+    `speech_started` set when the backend is already speaking, so the page must not call
+    request_tts for it. Any query still in flight is cancelled.
+
+    Returns:
+        dict: {'request_id': int} identifying the tokens and result of this query
+    """
+    return {'request_id': query_manager.submit(user_query_text)}
+
+@eel.expose
+def cancel_query():
+    """
+    Cancels the query in flight, if any (the page's stop action). Its query_result is
+    pushed with `cancelled` set, so the page leaves its processing state.
+    Returns True if one was cancelled.
+    """
+    return query_manager.cancel()
 
 @eel.expose
 def request_tts(text_to_speak: str):
@@ -216,6 +402,10 @@ def request_tts(text_to_speak: str):
     if not text_to_speak or not isinstance(text_to_speak, str) or not text_to_speak.strip():
         print("TTS Request Ignored: No valid text provided.")
         return False
+
+    if tts_manager.is_already_spoken(text_to_speak):
+        print("TTS Request Ignored: The backend is already speaking this response.")
+        return True
     
     try:
         tts_manager.speak(text_to_speak.strip())
@@ -248,7 +438,14 @@ def get_system_status():
             'tts_speaking': tts_manager.is_currently_speaking(),
             'system_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'microphone_available': True,  # This would need proper detection
-            'speech_recognition_available': True  # This would need proper detection
+            'speech_recognition_available': True,  # This would need proper detection
+            'tool_latency': assistant.tool_latency.summary() if assistant else {},
+            'intent_router': assistant.intent_router.stats() if assistant else {},
+            'tts_latency': TTS_METRICS.summary(),
+            'tts_cache': TTS_CACHE.stats(),
+            'barge_in_latency': BARGE_IN_LATENCY.summary(),
+            'tts_engines': TTS_SYNTHESIZER.stats(),
+            'speculation': speculator.stats() if speculator else {}
         }
         return status
     except Exception as e:
@@ -372,6 +569,11 @@ def main():
         if tts_manager and tts_manager.is_currently_speaking():
             print("🔇 Stopping TTS...")
             tts_manager.stop()
+        if assistant:
+            print("💾 Flushing conversation history...")
+            assistant.db.close()
+            if assistant.task_executor:
+                assistant.task_executor.close()
         print("✅ FALCON UI application has closed.")
 
 if __name__ == '__main__':
@@ -0,0 +1,364 @@
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import uuid
+import queue
+import hashlib
+import argparse
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, Response, jsonify, request
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from Backend.Brain import FALCONAssistant, FALCONDatabase, CompletionCancelled, DEFAULT_SESSION
+
+# Session IDs are "<nonce>-<signature>", both hex; only IDs this server (or one sharing its
+# secret) minted verify, so clients cannot pick an ID and read someone else's history
+SESSION_ID_PATTERN = re.compile(r"^[0-9a-f]{32}-[0-9a-f]{32}$")
+
+# Sessions that exist outside the API (the desktop app's) are never served
+RESERVED_SESSION_IDS = frozenset({DEFAULT_SESSION})
+
+# Shared by every server process behind a load balancer so they accept each other's sessions
+SECRET_ENV = "FALCON_SESSION_SECRET"
+
+
+class APIError(Exception):
+    """Client-facing error, returned as {"error": message} with an HTTP status."""
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class Session:
+    """State of one conversation: activity timestamps and the turn in flight, if any."""
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.created = time.time()
+        self.last_active = self.created
+        self.turns = 0
+        self.cancel_event = None
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "created": self.created,
+            "last_active": self.last_active,
+            "turns": self.turns,
+            "busy": self.cancel_event is not None,
+        }
+
+
+class SessionRegistry:
+    """
+    In-process session table. Session IDs are minted by `create` and signed with the
+    server secret. History and memory live in FALCONDatabase under the session ID, so an
+    unknown ID with a valid signature (e.g. after a restart, or from another instance
+    behind the load balancer) is adopted; anything else is refused. One turn runs per
+    session: a new query cancels the one in flight, like a new voice query does in the
+    desktop app.
+    """
+    def __init__(self, secret: bytes, idle_timeout: float = 3600.0, on_expire=None):
+        self.secret = secret
+        self.idle_timeout = idle_timeout
+        # Called with each expired session ID, e.g. to drop per-session caches
+        self.on_expire = on_expire
+        self.lock = threading.Lock()
+        self.sessions = {}
+
+    def _sign(self, nonce: str) -> str:
+        return hmac.new(self.secret, nonce.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def verify(self, session_id: str) -> bool:
+        """True only for IDs minted with this registry's secret; reserved IDs never verify."""
+        if not session_id or session_id in RESERVED_SESSION_IDS or not SESSION_ID_PATTERN.match(session_id):
+            return False
+        nonce, signature = session_id.split("-")
+        return hmac.compare_digest(signature, self._sign(nonce))
+
+    def create(self) -> Session:
+        self.expire()
+        nonce = uuid.uuid4().hex
+        session = Session(f"{nonce}-{self._sign(nonce)}")
+        with self.lock:
+            self.sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id: str):
+        """Returns the session for a server-minted ID, adopting ones minted earlier; None otherwise."""
+        if not self.verify(session_id):
+            return None
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = Session(session_id)
+            session.last_active = time.time()
+            return session
+
+    def begin_turn(self, session: Session) -> threading.Event:
+        """Registers a new turn for the session, cancelling the previous one. Returns its cancel event."""
+        cancel_event = threading.Event()
+        with self.lock:
+            previous, session.cancel_event = session.cancel_event, cancel_event
+            session.turns += 1
+            session.last_active = time.time()
+        if previous is not None:
+            previous.set()
+        return cancel_event
+
+    def end_turn(self, session: Session, cancel_event: threading.Event):
+        with self.lock:
+            if session.cancel_event is cancel_event:
+                session.cancel_event = None
+            session.last_active = time.time()
+
+    def expire(self):
+        """Forgets idle sessions with nothing in flight; their history and memory stay in the database."""
+        cutoff = time.time() - self.idle_timeout
+        with self.lock:
+            expired = [sid for sid, s in self.sessions.items() if s.last_active < cutoff and s.cancel_event is None]
+            for session_id in expired:
+                del self.sessions[session_id]
+        if self.on_expire:
+            for session_id in expired:
+                self.on_expire(session_id)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "active": len(self.sessions),
+                "busy": sum(1 for s in self.sessions.values() if s.cancel_event is not None),
+            }
+
+
+class TurnPool:
+    """
+    Bounded worker pool for conversation turns. `max_workers` turns run at once and up to
+    `max_queue` more wait; anything beyond that is refused so callers get a fast 503
+    instead of an ever-growing backlog.
+    """
+    def __init__(self, max_workers: int = 8, max_queue: int = 32):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="FalconServer")
+        self.slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _release(self, _future):
+        with self.lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self.slots.release()
+
+    def submit(self, fn, *args):
+        """Returns a Future, or None when the pool and its queue are full."""
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            return None
+        with self.lock:
+            self.in_flight += 1
+        future = self.pool.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+def _sse(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def create_app(assistant: FALCONAssistant, max_workers: int = 8, max_queue: int = 32, idle_timeout: float = 3600.0,
+               secret: bytes = None) -> Flask:
+    """
+    Builds the headless HTTP API around one shared cognitive core.
+
+    Args:
+        assistant (FALCONAssistant): Core serving every session
+        max_workers (int): Turns processed concurrently
+        max_queue (int): Turns allowed to wait for a worker before requests are refused
+        idle_timeout (float): Seconds after which idle sessions are dropped from memory
+        secret (bytes): Key signing session IDs; a random one (valid until restart) if None
+
+    Returns:
+        Flask: The WSGI application
+    """
+    app = Flask(__name__)
+    sessions = SessionRegistry(secret or secrets.token_bytes(32), idle_timeout, on_expire=assistant.db.release_memory_index)
+    turns = TurnPool(max_workers, max_queue)
+
+    @app.errorhandler(APIError)
+    def handle_api_error(e):
+        return jsonify({"error": str(e)}), e.status
+
+    def lookup(session_id) -> Session:
+        session = sessions.get(session_id)
+        if session is None:
+            raise APIError("Unknown session ID; create one with POST /api/sessions.", 404)
+        return session
+
+    def run_turn(session, message, cancel_event, on_token=None):
+        try:
+            return assistant.process_message(message, on_token=on_token, cancel_event=cancel_event, session_id=session.session_id)
+        finally:
+            sessions.end_turn(session, cancel_event)
+
+    def start_turn(session_id, on_token=None):
+        """Validates the request and queues the turn. Returns (session, future, cancel_event)."""
+        session = lookup(session_id)
+        message = ((request.get_json(silent=True) or {}).get("message") or "").strip()
+        if not message:
+            raise APIError("A non-empty 'message' is required.")
+        cancel_event = sessions.begin_turn(session)
+        future = turns.submit(run_turn, session, message, cancel_event, on_token)
+        if future is None:
+            sessions.end_turn(session, cancel_event)
+            raise APIError("Server is busy, please retry.", 503)
+        return session, future, cancel_event
+
+    @app.post("/api/sessions")
+    def create_session():
+        return jsonify(sessions.create().to_dict()), 201
+
+    @app.get("/api/sessions/<session_id>")
+    def get_session(session_id):
+        return jsonify(lookup(session_id).to_dict())
+
+    @app.post("/api/sessions/<session_id>/query")
+    def query(session_id):
+        session, future, _ = start_turn(session_id)
+        try:
+            response = future.result()
+        except CompletionCancelled:
+            raise APIError("Superseded by a newer query in this session.", 409)
+        return jsonify({"session_id": session.session_id, "response": response})
+
+    @app.post("/api/sessions/<session_id>/stream")
+    def stream(session_id):
+        deltas = queue.Queue()
+        _, future, cancel_event = start_turn(session_id, deltas.put)
+        future.add_done_callback(lambda _: deltas.put(None))
+
+        def events():
+            try:
+                while (delta := deltas.get()) is not None:
+                    yield _sse({"token": delta})
+                try:
+                    yield _sse({"done": True, "response": future.result()})
+                except CompletionCancelled:
+                    yield _sse({"done": True, "cancelled": True})
+                except Exception as e:
+                    yield _sse({"done": True, "error": str(e)})
+            finally:
+                # The client went away mid-answer: stop generating for it
+                if not future.done():
+                    cancel_event.set()
+
+        return Response(events(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @app.get("/api/sessions/<session_id>/history")
+    def history(session_id):
+        session = lookup(session_id)
+        limit = min(max(request.args.get("limit", 20, type=int), 1), 200)
+        return jsonify({
+            "session_id": session.session_id,
+            "history": assistant.db.get_recent_conversation(limit=limit, session_id=session.session_id),
+        })
+
+    # Memory notes belong to the session that saved them, like its history
+    @app.get("/api/sessions/<session_id>/memory")
+    def search_memory(session_id):
+        session = lookup(session_id)
+        query_text = (request.args.get("q") or "").strip()
+        if not query_text:
+            raise APIError("Query parameter 'q' is required.")
+        limit = min(max(request.args.get("limit", 5, type=int), 1), 50)
+        return jsonify({"memories": assistant.db.search_memory_semantic(query_text, limit, owner=session.session_id)})
+
+    @app.post("/api/sessions/<session_id>/memory")
+    def add_memory(session_id):
+        session = lookup(session_id)
+        body = request.get_json(silent=True) or {}
+        note = (body.get("note") or "").strip()
+        if not note:
+            raise APIError("A non-empty 'note' is required.")
+        memory_id = assistant.db.add_memory_note(note, body.get("keywords"), owner=session.session_id)
+        return jsonify({"id": memory_id}), 201
+
+    @app.delete("/api/sessions/<session_id>/memory/<int:memory_id>")
+    def forget_memory(session_id, memory_id):
+        session = lookup(session_id)
+        if not assistant.db.forget_memory_note(memory_id, owner=session.session_id):
+            raise APIError(f"No memory with ID {memory_id}.", 404)
+        return jsonify({"id": memory_id, "deleted": True})
+
+    @app.get("/api/health")
+    def health():
+        return jsonify({
+            "status": "ok",
+            "sessions": sessions.stats(),
+            "pool": turns.stats(),
+            "tool_latency": assistant.tool_latency.summary(),
+            "intent_router": assistant.intent_router.stats(),
+        })
+
+    return app
+
+
+def main():
+    """Starts the headless multi-session API server."""
+    parser = argparse.ArgumentParser(description="FALCON headless HTTP API")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=5000, help="Port to listen on (default: 5000)")
+    # Not the desktop app's database: API clients must never see its history or notes
+    parser.add_argument("--db", default="Database/FALCON_server.db", help="SQLite database file (default: Database/FALCON_server.db)")
+    parser.add_argument("--workers", type=int, default=8, help="Turns processed concurrently (default: 8)")
+    parser.add_argument("--queue", type=int, default=32, help="Turns waiting for a worker before returning 503 (default: 32)")
+    parser.add_argument("--shared-db", action="store_true",
+                        help="Several server processes use this database file; disables write-behind so turns are visible to the others at once")
+    args = parser.parse_args()
+
+    secret = os.getenv(SECRET_ENV)
+    db = FALCONDatabase(args.db, write_behind=not args.shared_db)
+    # Headless: tools that act on the host machine (apps, songs, files, images) are not offered
+    assistant = FALCONAssistant(db=db, desktop_tools=False)
+    app = create_app(assistant, max_workers=args.workers, max_queue=args.queue, secret=secret.encode() if secret else None)
+
+    print("=" * 60)
+    print("🚀 Starting FALCON Headless API")
+    print("=" * 60)
+    print(f"🌐 Listening on: http://{args.host}:{args.port}/api")
+    print(f"🗄️ Database: {args.db}{' (shared)' if args.shared_db else ''}")
+    print(f"⚙️ Workers: {args.workers}, queue: {args.queue}")
+    if not secret:
+        print(f"⚠️ {SECRET_ENV} is not set: sessions are valid until this process restarts")
+    print("=" * 60)
+    try:
+        app.run(host=args.host, port=args.port, threaded=True)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()